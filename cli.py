@@ -1,21 +1,21 @@
 """CLI entry point — argparse interface wiring the full splicer pipeline."""
 
 import argparse
+import os
 import random
-import shutil
 import sys
 import tempfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 from core.config import SplicerConfig
-from core.platform import platform_check, PlatformError
-from core.probe import probe, ProbeError
+from core.platform import platform_check, user_cache_dir, PlatformError
+from core.probe import PROBE_CACHE_FILENAME, ProbeCache, ProbeError
 from core.normalize import normalize_video, normalize_image
-from core.chunk import chunk_video
+from core.chunk import chunk_video, draw_sub_seeds
 from core.assemble import assemble
 from core.manifest import Manifest
-from core.prep import grain_video, greyscale_video, collect_videos
+from core.prep import grain_and_greyscale, grain_video, greyscale_video, collect_videos
 
 
 IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".tif", ".webp"}
@@ -43,6 +43,11 @@ def main() -> None:
             return
         # If both --benchmark and --dry-run, fall through to dry-run
 
+    # Source probes persist in the user cache (or --cache-dir), never in the
+    # output dir, so a dry run warms the real run without creating anything there
+    cache_root = Path(config.cache_dir).expanduser() if config.cache_dir else user_cache_dir()
+    probe_cache = ProbeCache((cache_root or Path(config.output_dir)) / PROBE_CACHE_FILENAME)
+
     # Dry-run mode — estimate and exit
     if args.dry_run:
         from core.estimator import estimate as run_estimate
@@ -53,7 +58,8 @@ def main() -> None:
         if not input_paths:
             print("error: no valid input files found", file=sys.stderr)
             sys.exit(1)
-        est = run_estimate(input_paths, config)
+        est = run_estimate(input_paths, config, probe_cache=probe_cache)
+        probe_cache.save()
         est.print_summary()
         return
 
@@ -87,83 +93,86 @@ def main() -> None:
     output_dir = Path(config.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    with tempfile.TemporaryDirectory(prefix="splicer_") as tmpdir:
+    # One worker pool for every phase — warm threads carry over from
+    # normalize to chunk to assemble instead of being torn down per phase
+    with (
+        tempfile.TemporaryDirectory(prefix="splicer_") as tmpdir,
+        ThreadPoolExecutor(max_workers=config.max_workers) as pool,
+    ):
         work_dir = Path(tmpdir)
         norm_dir = work_dir / "normalized"
         chunk_dir = work_dir / "chunks"
         norm_dir.mkdir()
         chunk_dir.mkdir()
 
-        # --- Phase 1: Probe & Normalize ---
-        print(f"\n--- Probing and normalizing inputs ({config.max_workers} workers) ---")
-        normalized_videos: list[Path] = []
+        # --- Phase 1+2: Probe, normalize and chunk ---
+        # Each video is chunked by the same task that normalized it, so chunking
+        # starts as soon as any one video is ready instead of after all of them.
+        print(f"\n--- Normalizing and chunking inputs ({config.max_workers} workers) ---")
+
+        # Pre-generate deterministic per-video sub-RNGs sequentially
+        sub_seeds = draw_sub_seeds(rng, len(videos))
 
-        def _normalize_one(idx: int, vid: Path) -> tuple[int, Path | None, str]:
-            """Probe and normalize a single video. Returns (index, output_path, status_msg)."""
+        def _process_one(idx: int, vid: Path, seed: int) -> tuple[int, list | None, str]:
+            """Probe, normalize and chunk a single video. Returns (index, chunks, status_msg)."""
             try:
-                info = probe(vid)
+                info = probe_cache.probe(vid, config.probe_timeout)
                 vfr_note = f" (VFR->CFR {config.target_fps}fps)" if info.is_vfr else ""
-                out = norm_dir / f"norm_{idx:04d}.mp4"
-                normalize_video(vid, out, config, probe_result=info)
-                return idx, out, f"  [{idx+1}/{len(videos)}] {vid.name}{vfr_note}"
+                norm_path = norm_dir / f"norm_{idx:04d}.mp4"
+                normalize_video(vid, norm_path, config, probe_result=info)
             except (ProbeError, RuntimeError) as e:
                 return idx, None, f"  [{idx+1}/{len(videos)}] {vid.name} SKIPPED: {e}"
 
-        with ThreadPoolExecutor(max_workers=config.max_workers) as pool:
-            futures = {pool.submit(_normalize_one, i, v): i for i, v in enumerate(videos)}
-            results: list[tuple[int, Path | None, str]] = []
-            for future in as_completed(futures):
-                idx, out, msg = future.result()
-                print(msg)
-                results.append((idx, out, msg))
-
-        # Sort by original index for deterministic ordering
-        results.sort(key=lambda r: r[0])
-        normalized_videos = [out for _, out, _ in results if out is not None]
-
-        for i, img in enumerate(images):
-            print(f"  [img {i+1}/{len(images)}] {img.name}")
-            # Images get normalized during assembly, just validate here
+            sub_rng = random.Random(seed)
+            # Each video gets its own subdir to avoid filename collisions
+            vid_chunk_dir = chunk_dir / f"v{idx:04d}"
+            vid_chunk_dir.mkdir(exist_ok=True)
+            chunks = chunk_video(
+                norm_path, vid_chunk_dir, config, sub_rng, start_index=0, intra_only=True,
+            )
+            return idx, chunks, f"  [{idx+1}/{len(videos)}] {vid.name}{vfr_note} -> {len(chunks)} chunks"
+
+        # Images get normalized during assembly, just validate here
+        def _validate_image(idx: int, img: Path) -> tuple[int, bool, str]:
+            """Probe a single image. Returns (index, ok, status_msg)."""
             try:
-                probe(img)
+                probe_cache.probe(img, config.probe_timeout)
+                return idx, True, f"  [img {idx+1}/{len(images)}] {img.name}"
             except ProbeError as e:
-                print(f"    SKIPPED: {e}")
-                images = [p for p in images if p != img]
-
-        if not normalized_videos and not images:
+                return idx, False, f"  [img {idx+1}/{len(images)}] {img.name} SKIPPED: {e}"
+
+        video_futures = [
+            pool.submit(_process_one, i, v, s)
+            for i, (v, s) in enumerate(zip(videos, sub_seeds))
+        ]
+        image_futures = [pool.submit(_validate_image, i, img) for i, img in enumerate(images)]
+
+        # Slot per input, filled as results arrive — already in original order
+        chunk_results: list[list | None] = [None] * len(videos)
+        for future in as_completed(video_futures):
+            idx, chunks, msg = future.result()
+            print(msg)
+            chunk_results[idx] = chunks
+        chunk_results = [chunks for chunks in chunk_results if chunks is not None]
+
+        skipped_images: set[int] = set()
+        for future in as_completed(image_futures):
+            idx, ok, msg = future.result()
+            print(msg)
+            if not ok:
+                skipped_images.add(idx)
+
+        images = [img for i, img in enumerate(images) if i not in skipped_images]
+        probe_cache.save()
+
+        if not chunk_results and not images:
             print("error: no inputs survived normalization", file=sys.stderr)
             sys.exit(1)
 
-        # --- Phase 2: Chunk ---
-        print(f"\n--- Chunking normalized videos ({config.max_workers} workers) ---")
-
-        # Pre-generate deterministic per-video sub-RNGs sequentially
-        sub_seeds = [rng.randint(0, 2**31 - 1) for _ in normalized_videos]
-
-        def _chunk_one(idx: int, norm_path: Path, seed: int) -> tuple[int, list]:
-            """Chunk a single normalized video with its own sub-RNG."""
-            sub_rng = random.Random(seed)
-            # Each video gets its own subdir to avoid filename collisions
-            vid_chunk_dir = chunk_dir / f"v{idx:04d}"
-            vid_chunk_dir.mkdir(exist_ok=True)
-            chunks = chunk_video(norm_path, vid_chunk_dir, config, sub_rng, start_index=0)
-            print(f"  [{idx+1}/{len(normalized_videos)}] {norm_path.name} -> {len(chunks)} chunks")
-            return idx, chunks
-
-        with ThreadPoolExecutor(max_workers=config.max_workers) as pool:
-            futures = {
-                pool.submit(_chunk_one, i, p, s): i
-                for i, (p, s) in enumerate(zip(normalized_videos, sub_seeds))
-            }
-            chunk_results: list[tuple[int, list]] = []
-            for future in as_completed(futures):
-                chunk_results.append(future.result())
-
-        # Reassemble in original order and re-index chunks
-        chunk_results.sort(key=lambda r: r[0])
+        # Re-index chunks across all videos
         all_chunks = []
         chunk_idx = 0
-        for _, chunks in chunk_results:
+        for chunks in chunk_results:
             for c in chunks:
                 c.chunk_index = chunk_idx
                 chunk_idx += 1
@@ -191,6 +200,7 @@ def main() -> None:
             manifest=manifest,
             work_dir=work_dir,
             output_path=output_path,
+            pool=pool,
         )
 
         # --- Phase 4: Write manifest ---
@@ -200,8 +210,8 @@ def main() -> None:
 
     print(f"Output:   {output_path}")
     print(f"Frames:   {manifest.actual_frame_count} (expected {manifest.expected_frame_count})")
-    if manifest.luma_flags:
-        print(f"Luma warnings: {len(manifest.luma_flags)}")
+    if manifest.luma_flag_count:
+        print(f"Luma warnings: {manifest.luma_flag_count}")
     print("Done.")
 
 
@@ -238,12 +248,19 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--buffer-frames", type=int, default=None, help="Gray buffer frames between cuts (default: 1)")
     p.add_argument("--luma-strength", type=float, default=None, help="Luma normalization strength 0.0-1.0 (default: 0.5)")
     p.add_argument("--luma-threshold", type=int, default=None, help="Luma delta warning threshold 0-255 (default: 80)")
+    p.add_argument("--verify-luma", action="store_true", help="Re-probe luma-normalized clips for the delta pass instead of trusting estimates")
 
     # Codec
     p.add_argument("--preset", default=None, help="x264 preset (default: fast)")
+    p.add_argument("--hw-encoder", default=None, dest="hw_encoder", help="Hardware encoder for every encode (normalize, chunks, buffers, luma, greyscale): 'auto' or an ffmpeg encoder name (default: software)")
+    p.add_argument("--no-verify", action="store_true", dest="no_verify", help="Skip the final ffprobe of the output and record the expected frame count")
 
     # Parallelism
     p.add_argument("--workers", type=int, default=None, help="Thread pool size for parallel operations (default: 4)")
+    p.add_argument("--max-encodes", type=int, default=None, help="Concurrent luma re-encodes (default: half the CPU cores)")
+    p.add_argument("--probe-timeout", type=int, default=None, dest="probe_timeout", help="Seconds before an ffprobe run is abandoned (default: 30)")
+    p.add_argument("--ffmpeg-timeout", type=int, default=None, dest="ffmpeg_timeout", help="Seconds before any single ffmpeg run (normalize, chunk, luma, assemble, prep) is abandoned (default: per-stage, scaled by length)")
+    p.add_argument("--cache-dir", type=str, default=None, dest="cache_dir", help="Reuse generated buffer/benchmark clips and source probes across runs from this directory")
 
     # Prep mode
     p.add_argument("--prep", action="store_true", help="Preprocessing mode — grain/greyscale sources, then exit (no splicer pipeline)")
@@ -291,12 +308,26 @@ def build_config(args: argparse.Namespace) -> SplicerConfig:
         config.antistrobe_luma_strength = args.luma_strength
     if args.luma_threshold is not None:
         config.antistrobe_delta_threshold = args.luma_threshold
+    if args.verify_luma:
+        config.antistrobe_trust_estimates = False
     if args.preset is not None:
         config.preset = args.preset
+    if args.hw_encoder is not None:
+        config.hw_encoder = args.hw_encoder
+    if args.no_verify:
+        config.verify_output = False
     if args.grain_duration is not None:
         config.grain_duration = args.grain_duration
     if args.workers is not None:
         config.max_workers = args.workers
+    if args.max_encodes is not None:
+        config.max_parallel_encodes = args.max_encodes
+    if args.probe_timeout is not None:
+        config.probe_timeout = args.probe_timeout
+    if args.ffmpeg_timeout is not None:
+        config.ffmpeg_timeout = args.ffmpeg_timeout
+    if args.cache_dir is not None:
+        config.cache_dir = args.cache_dir
 
     return config
 
@@ -317,39 +348,32 @@ def run_prep(args: argparse.Namespace, config: SplicerConfig) -> None:
 
     print(f"Prep mode: {len(videos)} video(s)")
 
-    working_files = videos
+    if args.grain and args.greyscale:
+        # One re-encode per video: greyscale while segmenting
+        print(f"\n--- Grain + greyscale: ~{config.grain_duration}s segments ---")
+        outputs: list[Path] = []
+        for vid in videos:
+            outputs.extend(grain_and_greyscale(vid, output_dir, config))
+        print(f"Grain + greyscale complete: {len(outputs)} file(s)")
 
-    if args.grain:
+    elif args.grain:
         print(f"\n--- Grain: splitting into ~{config.grain_duration}s segments ---")
-        grain_dir = output_dir / "_grain_tmp" if args.greyscale else output_dir
-        grain_dir.mkdir(parents=True, exist_ok=True)
-
         grained: list[Path] = []
-        for vid in working_files:
-            segments = grain_video(vid, grain_dir, config)
+        for vid in videos:
+            segments = grain_video(vid, output_dir, config)
             grained.extend(segments)
 
         print(f"Grain complete: {len(grained)} segment(s)")
-        working_files = grained
 
-    if args.greyscale:
+    else:
         print("\n--- Greyscale ---")
-        grey_dir = output_dir
-        grey_dir.mkdir(parents=True, exist_ok=True)
-
         greyed: list[Path] = []
-        for vid in working_files:
-            out = greyscale_video(vid, grey_dir, config)
+        for vid in videos:
+            out = greyscale_video(vid, output_dir, config)
             greyed.append(out)
 
         print(f"Greyscale complete: {len(greyed)} file(s)")
 
-        # Clean up intermediate grain files if both modes ran
-        if args.grain:
-            grain_dir = output_dir / "_grain_tmp"
-            if grain_dir.exists():
-                shutil.rmtree(grain_dir)
-
     print("\nPrep done.")
     print(f"Output: {output_dir}")
 
@@ -362,9 +386,15 @@ def collect_inputs(paths: list[str]) -> list[Path]:
     for p_str in paths:
         p = Path(p_str)
         if p.is_dir():
-            for child in sorted(p.iterdir()):
-                if child.is_file() and child.suffix.lower() in valid_ext:
-                    result.append(child)
+            # DirEntry caches is_file() from readdir — no extra stat per entry
+            with os.scandir(p) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            for e in entries:
+                if not e.is_file():
+                    continue
+                dot = e.name.rfind(".")
+                if dot >= 0 and e.name[dot:].lower() in valid_ext:
+                    result.append(Path(e.path))
         elif p.is_file() and p.suffix.lower() in valid_ext:
             result.append(p)
         else:
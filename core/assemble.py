@@ -1,16 +1,43 @@
 """Final assembly — concat, image interleaving, anti-strobe buffers, luma pass."""
 
+import atexit
+import operator
+import os
 import random
 import shutil
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import tempfile
+import threading
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, as_completed, wait
+from itertools import accumulate, repeat
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, TypeVar
 
 from .config import SplicerConfig
 from .chunk import ChunkInfo
+from .ffmpeg import cached_output, encoder_args, ffmpeg_bin, resolve_hw_encoder, run_ffmpeg
 from .manifest import Manifest, ImageEntry, LumaFlag
 from .normalize import normalize_image
-from .probe import probe, probe_mean_luma
+from .probe import ProbeError, probe, probe_frame_luma, probe_mean_luma
+
+# Brightness quantization step for batched luma encodes (eq brightness units, ~5/255)
+_LUMA_BUCKET_STEP = 0.02
+
+# Fewest clips worth a separate signalstats process when sharding luma probes
+_LUMA_PROBE_MIN_SHARD = 32
+
+# Most lone-bucket clips re-encoded together by one multi-output ffmpeg process
+_LUMA_MULTI_MAX = 16
+
+# Gray buffer clips keyed by encode settings, reused across assemblies in-process
+_buffer_frame_cache: dict[tuple, str] = {}
+_buffer_frame_lock = threading.Lock()
+_buffer_frame_dir: Path | None = None
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
 
 
 def assemble(
@@ -21,6 +48,7 @@ def assemble(
     manifest: Manifest,
     work_dir: Path,
     output_path: str | Path,
+    pool: Executor | None = None,
 ) -> Path:
     """Assemble chunks and images into final output.
 
@@ -30,19 +58,38 @@ def assemble(
     4. Optionally apply luma normalization
     5. Concat everything via ffmpeg demuxer
     6. Run luma delta safety pass
+
+    pool is the caller's long-lived worker pool; one sized to max_workers is
+    created for the duration of the call if omitted.
     """
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=config.max_workers) as own_pool:
+            return assemble(
+                chunks, image_paths, config, rng, manifest, work_dir, output_path,
+                pool=own_pool,
+            )
+
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Resolve once; every intermediate path below is derived from it
+    work_dir = Path(work_dir).resolve()
 
     # Collect chunk file paths in randomized order
     print(f"  shuffling {len(chunks)} chunks...")
-    chunk_paths = [c.chunk_path for c in chunks]
-    rng.shuffle(chunk_paths)
-
-    # Build a map from chunk_path -> frame_count for metadata-based frame counting
-    chunk_frame_map: dict[str, int] = {}
-    for c in chunks:
-        chunk_frame_map[c.chunk_path] = c.frame_count
+    # Shuffle compact integer handles, then map back to paths in one pass.
+    # Same permutation as shuffling the path list (shuffle depends only on length).
+    order = array("L", range(len(chunks)))
+    rng.shuffle(order)
+    # Absolute path strings from here on — images, buffer and normalized clips
+    # all live under absolute dirs — so every per-path dict below shares keys
+    # and the concat list needs no per-entry path fixups
+    chunk_abs = [os.path.abspath(c.chunk_path) for c in chunks]
+    chunk_paths = [chunk_abs[i] for i in order]
+    manifest.shuffled_order = order.tolist()
+
+    # Known per-clip frame counts, seeded from metadata as each clip is created.
+    # Frame counting and bulk luma probing read this instead of ffprobe.
+    clip_frames: dict[str, int] = dict(zip(chunk_abs, (c.frame_count for c in chunks)))
 
     # Prepare image segments
     image_segments = _prepare_images(image_paths, config, rng, work_dir)
@@ -52,16 +99,13 @@ def assemble(
     # Interleave images into the chunk sequence
     sequence = _interleave_images(chunk_paths, image_segments, rng, manifest)
 
-    # Build image frame map for expected frame counting
-    image_frame_map: dict[str, int] = {}
-    for img_path, duration in image_segments:
-        image_frame_map[img_path] = duration
+    clip_frames.update(image_segments)
 
     # Insert anti-strobe buffer frames
     pre_buffer_len = len(sequence)
     buffer_path = None
     if config.antistrobe_enabled and config.antistrobe_buffer_frames > 0:
-        buffer_path = _generate_buffer_frame(config, work_dir)
+        buffer_path = _generate_buffer_frame(config)
         sequence = _insert_buffers(sequence, buffer_path, config)
         num_buffers = pre_buffer_len - 1 if pre_buffer_len > 0 else 0
         print(f"  inserted buffer frames ({pre_buffer_len} -> {len(sequence)} entries)")
@@ -69,48 +113,109 @@ def assemble(
     # Shared luma cache — used by both normalize and delta pass
     luma_cache: dict[str, float] = {}
 
-    # Optional luma normalization pass
-    norm_cache: dict[str, str] = {}  # original_path -> normalized_path
-    if config.antistrobe_enabled and config.antistrobe_luma_strength > 0:
-        sequence, norm_cache = _luma_normalize(sequence, config, work_dir, luma_cache)
+    if buffer_path is not None:
+        clip_frames[buffer_path] = config.antistrobe_buffer_frames
+
+    # Measure luma once, up front; normalization and the delta pass below
+    # work from the cache and never spawn their own probes
+    if config.antistrobe_enabled and (
+        config.antistrobe_luma_strength > 0 or config.antistrobe_delta_threshold > 0
+    ):
+        unique_paths = list(dict.fromkeys(sequence))
+        t0 = time.perf_counter()
+        _probe_luma(unique_paths, luma_cache, config, clip_frames, work_dir, pool)
+        manifest.add_stage_timing(
+            "luma_probe", sum(clip_frames.get(p, 0) for p in unique_paths),
+            time.perf_counter() - t0,
+        )
 
-    # Build a reverse map so normalized paths resolve to original frame counts
-    norm_frame_map: dict[str, int] = {}
+    # Optional luma normalization pass. Short sequences are normalized and
+    # concatenated by one filter graph straight into the output; longer ones
+    # re-encode shifted clips to disk and join them with the concat demuxer.
+    norm_cache: dict[str, str] = {}  # original_path -> normalized_path
+    fused = False
+    if config.antistrobe_enabled and config.antistrobe_luma_strength > 0 and luma_cache:
+        if (
+            config.antistrobe_trust_estimates
+            and 0 < len(sequence) <= config.antistrobe_fuse_max_entries
+        ):
+            t0 = time.perf_counter()
+            fused = _assemble_fused(
+                sequence, config, luma_cache, buffer_path, clip_frames, output_path,
+            )
+            if fused:
+                # Every output frame passed through the eq/encode graph
+                manifest.add_stage_timing(
+                    "luma_encode", sum(map(clip_frames.get, sequence, repeat(0))),
+                    time.perf_counter() - t0,
+                )
+        if not fused:
+            t0 = time.perf_counter()
+            sequence, norm_cache = _luma_normalize(
+                sequence, config, work_dir, luma_cache, clip_frames, pool,
+            )
+            if norm_cache:
+                manifest.add_stage_timing(
+                    "luma_encode", sum(clip_frames.get(p, 0) for p in norm_cache),
+                    time.perf_counter() - t0,
+                )
+
+    # Normalized outputs keep their source's frame count
     for orig_path, norm_path in norm_cache.items():
-        if orig_path in chunk_frame_map:
-            norm_frame_map[norm_path] = chunk_frame_map[orig_path]
-        elif orig_path in image_frame_map:
-            norm_frame_map[norm_path] = image_frame_map[orig_path]
+        clip_frames[norm_path] = clip_frames[orig_path]
+
+    # Normalized outputs carry an estimate (source luma + applied brightness);
+    # measure them instead when estimates are not trusted
+    if norm_cache and not config.antistrobe_trust_estimates:
+        norm_paths = list(norm_cache.values())
+        for p in norm_paths:
+            luma_cache.pop(p, None)
+        _probe_luma(norm_paths, luma_cache, config, clip_frames, work_dir, pool)
 
     # Store sequence in manifest
     manifest.sequence_order = sequence
 
     # Compute expected frame count from metadata (no subprocess calls)
-    expected = _count_expected_frames(
-        sequence, chunk_frame_map, image_frame_map, norm_frame_map,
-        buffer_path, config,
-    )
+    expected, cum_frames = _count_expected_frames(sequence, clip_frames)
     manifest.expected_frame_count = expected
-
-    # Write concat manifest and run final assembly
-    concat_path = work_dir / "concat_list.txt"
-    _write_concat_file(sequence, concat_path)
-    print(f"  concat: {len(sequence)} entries -> {output_path.name}")
-    _run_concat(concat_path, output_path, len(sequence))
-
-    # Verify output
-    out_info = probe(output_path)
-    manifest.set_output(output_path, out_info.frame_count)
-
-    if out_info.frame_count != expected:
-        print(
-            f"  warning: expected {expected} frames, got {out_info.frame_count} "
-            f"(delta: {out_info.frame_count - expected})"
-        )
+    manifest.position_to_output_frame = cum_frames
+
+    # Write concat manifest and run final assembly. Every intermediate comes
+    # from one software encoder with identical -g 1 -bf 0 settings, so the mp4
+    # clips share parameter sets and join directly. Hardware encoder sessions
+    # don't guarantee identical SPS/PPS, so with one in use the clips are
+    # remuxed to MPEG-TS first and the demuxer sees in-band parameter sets.
+    if not fused:
+        if len(sequence) == 1:
+            # Nothing to join — link the lone clip into place
+            print(f"  single entry: linking -> {output_path.name}")
+            _link_or_copy(sequence[0], output_path)
+        else:
+            t0 = time.perf_counter()
+            concat_path = work_dir / "concat_list.txt"
+            concat_sequence = sequence
+            if resolve_hw_encoder(config.hw_encoder, config.codec) is not None:
+                concat_sequence = _remux_to_ts(sequence, config, work_dir, pool)
+            _write_concat_file(concat_sequence, concat_path)
+            print(f"  concat: {len(sequence)} entries -> {output_path.name}")
+            _run_concat(concat_path, output_path, len(sequence), config.ffmpeg_timeout)
+            manifest.add_stage_timing("concat", expected, time.perf_counter() - t0)
+
+    # Verify output, or trust the metadata-derived count
+    if config.verify_output:
+        out_frames = probe(output_path, config.probe_timeout).frame_count
+        if out_frames != expected:
+            print(
+                f"  warning: expected {expected} frames, got {out_frames} "
+                f"(delta: {out_frames - expected})"
+            )
+    else:
+        out_frames = expected
+    manifest.set_output(output_path, out_frames, config.output_checksum)
 
     # Luma delta safety pass
     if config.antistrobe_enabled:
-        _luma_delta_pass(sequence, config, manifest, luma_cache)
+        _luma_delta_pass(sequence, config, manifest, luma_cache, cum_frames)
 
     return output_path
 
@@ -120,13 +225,25 @@ def _prepare_images(
     config: SplicerConfig,
     rng: random.Random,
     work_dir: Path,
-) -> list[str]:
-    """Normalize images to video segments, return paths."""
+) -> list[tuple[str, int]]:
+    """Normalize images to video segments, return (path, duration_frames) pairs.
+
+    An image ffmpeg cannot decode is skipped with a warning — the encode is
+    its validation, so callers need not probe images beforehand.
+    """
+    # Draw every duration in one call rather than a randint per image
+    durations = rng.choices(
+        range(config.image_frames_min, config.image_frames_max + 1),
+        k=len(image_paths),
+    )
     segments = []
-    for i, img in enumerate(image_paths):
-        duration = rng.randint(config.image_frames_min, config.image_frames_max)
+    for i, (img, duration) in enumerate(zip(image_paths, durations)):
         out = work_dir / f"img_segment_{i:04d}.mp4"
-        normalize_image(img, out, config, duration_frames=duration)
+        try:
+            normalize_image(img, out, config, duration_frames=duration)
+        except RuntimeError:
+            print(f"  warning: {Path(img).name} could not be decoded, skipping")
+            continue
         segments.append((str(out), duration))
 
     return segments
@@ -138,29 +255,75 @@ def _interleave_images(
     rng: random.Random,
     manifest: Manifest,
 ) -> list[str]:
-    """Insert image segments at random positions in the chunk sequence."""
-    sequence = list(chunk_paths)
+    """Insert image segments at random positions in the chunk sequence.
 
-    for img_path, duration in image_segments:
-        pos = rng.randint(0, len(sequence))
-        sequence.insert(pos, img_path)
+    All image slots are drawn up front and the merged list is filled in one
+    sweep, so each recorded position is the image's index in the result.
+    """
+    if not image_segments:
+        return list(chunk_paths)
+
+    merged_len = len(chunk_paths) + len(image_segments)
+    slots = rng.sample(range(merged_len), len(image_segments))
+
+    sequence: list[str | None] = [None] * merged_len
+    for pos, (img_path, duration) in zip(slots, image_segments):
+        sequence[pos] = img_path
         manifest.add_image(ImageEntry(
             source_file=img_path,
             position=pos,
             duration_frames=duration,
         ))
 
-    return sequence
+    chunk_iter = iter(chunk_paths)
+    return [entry if entry is not None else next(chunk_iter) for entry in sequence]
+
 
+def _generate_buffer_frame(config: SplicerConfig) -> str:
+    """Generate a mid-gray buffer frame video, reusing one from an earlier assembly.
 
-def _generate_buffer_frame(config: SplicerConfig, work_dir: Path) -> str:
-    """Generate a mid-gray buffer frame video (single frame)."""
-    ffmpeg = shutil.which("ffmpeg")
-    if ffmpeg is None:
-        raise RuntimeError("ffmpeg not found on PATH")
+    The clip depends only on encode settings, so it is generated once per
+    process into a directory that outlives individual work dirs — or once
+    ever, when config.cache_dir is set.
+    """
+    global _buffer_frame_dir
+
+    # Keyed on the resolved encoder args, so "auto" on another machine (or a
+    # shared cache_dir) never reuses a clip from a different encoder
+    key = (
+        config.width, config.height, config.target_fps, config.target_pix_fmt,
+        config.target_colorspace,
+        *encoder_args(config.codec, config.preset, config.hw_encoder),
+        config.antistrobe_buffer_frames,
+    )
+    with _buffer_frame_lock:
+        cached = _buffer_frame_cache.get(key)
+        if cached is not None and Path(cached).exists():
+            return cached
+
+        if config.cache_dir:
+            buf_path = cached_output(
+                config.cache_dir, "buffer", repr(key),
+                lambda path: _encode_buffer_frame(config, path),
+            )
+            _buffer_frame_cache[key] = str(buf_path)
+            return str(buf_path)
+
+        if _buffer_frame_dir is None:
+            _buffer_frame_dir = Path(tempfile.mkdtemp(prefix="splicer_buffer_")).resolve()
+            atexit.register(shutil.rmtree, _buffer_frame_dir, ignore_errors=True)
+
+        buf_path = _buffer_frame_dir / f"buffer_gray_{len(_buffer_frame_cache):03d}.mp4"
+        _encode_buffer_frame(config, buf_path)
+        _buffer_frame_cache[key] = str(buf_path)
+        return str(buf_path)
+
+
+def _encode_buffer_frame(config: SplicerConfig, buf_path: Path) -> None:
+    """Encode the mid-gray buffer clip via the lavfi color source."""
+    ffmpeg = ffmpeg_bin()
 
     w, h = config.width, config.height
-    buf_path = work_dir / "buffer_gray.mp4"
 
     # Generate 1 frame of 50% gray at target resolution
     # Using lavfi color source
@@ -170,24 +333,42 @@ def _generate_buffer_frame(config: SplicerConfig, work_dir: Path) -> str:
     cmd = [
         ffmpeg, "-y",
         "-f", "lavfi",
+        "-thread_queue_size", str(config.ffmpeg_thread_queue_size),
         "-i", f"color=c=0x808080:s={w}x{h}:r={config.target_fps}:d={duration}",
         "-vf", f"format={config.target_pix_fmt}",
+        "-threads", str(config.encoder_threads()),
         "-colorspace", config.target_colorspace,
         "-color_primaries", config.color_primaries,
         "-color_trc", config.color_trc,
-        "-c:v", config.codec,
-        "-preset", config.preset,
+        *encoder_args(config.codec, config.preset, config.hw_encoder),
         "-g", "1",
         "-bf", "0",
         "-an",
         str(buf_path),
     ]
 
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    result = run_ffmpeg(cmd, timeout=config.ffmpeg_timeout or 30)
     if result.returncode != 0:
         raise RuntimeError(f"Failed to generate buffer frame: {result.stderr[-1000:]}")
 
-    return str(buf_path)
+
+def _bounded_map(
+    pool: Executor,
+    fn: Callable[[_T], _R],
+    items: Iterable[_T],
+    limit: int,
+) -> Iterator[_R]:
+    """Yield fn(item) results in completion order with at most `limit` futures
+    in flight, so huge job lists never materialize as one giant future set."""
+    pending = set()
+    for item in items:
+        pending.add(pool.submit(fn, item))
+        if len(pending) >= limit:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    for future in as_completed(pending):
+        yield future.result()
 
 
 def _insert_buffers(
@@ -207,10 +388,89 @@ def _insert_buffers(
     return buffered
 
 
+def _probe_luma(
+    paths: list[str],
+    cache: dict[str, float],
+    config: SplicerConfig,
+    clip_frames: dict[str, int],
+    work_dir: Path,
+    pool: Executor,
+) -> None:
+    """Probe mean luma for multiple paths, populating cache.
+
+    When every frame count is known, paths are split into up to max_workers
+    contiguous shards and each shard is measured by one signalstats pass over
+    a concat list, shards running in parallel. Paths from failed shards (or
+    with unknown frame counts) fall back to one probe per path.
+    """
+    to_probe = [p for p in paths if p not in cache]
+    if not to_probe:
+        return
+
+    if all(clip_frames.get(p, 0) > 0 for p in to_probe):
+        n_shards = max(1, min(config.max_workers, len(to_probe) // _LUMA_PROBE_MIN_SHARD))
+        size = -(-len(to_probe) // n_shards)
+        shards = [(k, to_probe[k * size:(k + 1) * size]) for k in range(n_shards)]
+        print(f"  luma probe: {len(to_probe)} clips ({n_shards} pass{'es' if n_shards > 1 else ''})")
+
+        def _probe_shard(item: tuple[int, list[str]]) -> tuple[list[str], dict[str, float] | None]:
+            k, shard = item
+            return shard, _probe_luma_bulk(
+                shard, clip_frames, work_dir / f"luma_probe_{k:03d}.txt", config.ffmpeg_timeout,
+            )
+
+        failed: list[str] = []
+        for shard, values in _bounded_map(pool, _probe_shard, shards, n_shards):
+            if values is None:
+                failed.extend(shard)
+            else:
+                cache.update(values)
+        if not failed:
+            return
+        print(f"  luma probe: {len(failed)} clips failed single pass, probing per clip")
+        to_probe = failed
+
+    _probe_luma_parallel(to_probe, cache, config.max_workers, pool, config.ffmpeg_timeout or 120)
+
+
+def _probe_luma_bulk(
+    paths: list[str],
+    clip_frames: dict[str, int],
+    list_path: Path,
+    timeout: float = 0,
+) -> dict[str, float] | None:
+    """Run one signalstats pass over paths and split per-frame values by clip.
+
+    timeout 0 scales the limit with the frame total. Returns None if ffmpeg
+    fails or the decoded frame total does not match the known frame counts.
+    """
+    _write_concat_file(paths, list_path)
+
+    expected = sum(clip_frames[p] for p in paths)
+    try:
+        values = probe_frame_luma(
+            list_path, concat_list=True, timeout=timeout or max(120, expected // 20),
+        )
+    except (ProbeError, subprocess.TimeoutExpired):
+        return None
+    if len(values) != expected:
+        return None
+
+    means: dict[str, float] = {}
+    pos = 0
+    for p in paths:
+        n = clip_frames[p]
+        means[p] = sum(values[pos:pos + n]) / n
+        pos += n
+    return means
+
+
 def _probe_luma_parallel(
     paths: list[str],
     cache: dict[str, float],
     max_workers: int,
+    pool: Executor,
+    timeout: float = 120,
 ) -> None:
     """Probe mean luma for multiple paths in parallel, populating cache."""
     # Filter to paths not already cached
@@ -224,137 +484,362 @@ def _probe_luma_parallel(
 
     def _probe_one(path: str) -> tuple[str, float]:
         try:
-            return path, probe_mean_luma(path)
+            return path, probe_mean_luma(path, timeout)
         except Exception:
             return path, 128.0
 
-    with ThreadPoolExecutor(max_workers=max_workers) as pool:
-        futures = {pool.submit(_probe_one, p): p for p in to_probe}
-        for future in as_completed(futures):
-            path, luma = future.result()
-            cache[path] = luma
-            done += 1
-            if done % 500 == 0 or done == total:
-                print(f"\r  luma probe: {done}/{total}", end="", flush=True)
+    for path, luma in _bounded_map(pool, _probe_one, to_probe, max_workers * 2):
+        cache[path] = luma
+        done += 1
+        if done % 500 == 0 or done == total:
+            print(f"\r  luma probe: {done}/{total}", end="", flush=True)
 
     print()  # newline after progress
 
 
+def _luma_buckets(
+    unique_paths: list[str],
+    luma_cache: dict[str, float],
+    clip_frames: dict[str, int],
+    strength: float,
+) -> dict[int, list[str]]:
+    """Group clips that need a brightness shift by quantized brightness.
+
+    The target is the frame-weighted mean luma, so long clips pull it harder
+    than short ones. Bucket key k means eq=brightness=k*_LUMA_BUCKET_STEP.
+    Clips within 2.0 of the target, or whose shift quantizes to 0, are left out.
+    """
+    lumas = [luma_cache[p] for p in unique_paths]
+    weights = [clip_frames.get(p, 1) for p in unique_paths]
+    global_mean = sum(map(operator.mul, lumas, weights)) / sum(weights)
+
+    buckets: dict[int, list[str]] = {}
+    for p in unique_paths:
+        clip_luma = luma_cache.get(p, 128.0)
+        delta = global_mean - clip_luma
+        if abs(delta) >= 2.0:
+            brightness = max(-1.0, min(1.0, (delta / 255.0) * strength))
+            key = round(brightness / _LUMA_BUCKET_STEP)
+            # Bucket 0 would encode with eq=brightness=0 — an identity re-encode.
+            # This also covers low strengths where the shift is under 1/255.
+            if key == 0:
+                continue
+            buckets.setdefault(key, []).append(p)
+    return buckets
+
+
 def _luma_normalize(
     sequence: list[str],
     config: SplicerConfig,
     work_dir: Path,
     luma_cache: dict[str, float],
+    clip_frames: dict[str, int],
+    pool: Executor,
 ) -> tuple[list[str], dict[str, str]]:
-    """Apply luma normalization toward global mean. Returns (sequence, norm_cache)."""
+    """Apply luma normalization toward global mean. Returns (sequence, norm_cache).
+
+    Clips are grouped by quantized brightness so each group is re-encoded by a
+    single ffmpeg process instead of one process per clip. Clips alone in their
+    bucket are gathered into multi-output processes of up to _LUMA_MULTI_MAX.
+    """
     strength = config.antistrobe_luma_strength
     if strength <= 0:
         return sequence, {}
 
-    # Probe all unique clips in parallel
-    unique_paths = list(set(sequence))
-    _probe_luma_parallel(unique_paths, luma_cache, config.max_workers)
-
+    # Luma was measured up front by assemble
     if not luma_cache:
         return sequence, {}
+    buckets = _luma_buckets(list(dict.fromkeys(sequence)), luma_cache, clip_frames, strength)
 
-    global_mean = sum(luma_cache[p] for p in unique_paths) / len(unique_paths)
-
-    ffmpeg = shutil.which("ffmpeg")
-    normalized = []
+    ffmpeg = ffmpeg_bin()
     norm_dir = work_dir / "luma_normalized"
     norm_dir.mkdir(exist_ok=True)
 
-    # Determine which unique clips need encoding (delta >= 2.0)
-    encode_jobs: list[tuple[str, float]] = []
-    for p in unique_paths:
-        clip_luma = luma_cache.get(p, 128.0)
-        delta = global_mean - clip_luma
-        if abs(delta) >= 2.0:
-            encode_jobs.append((p, delta))
+    # Encode jobs: each multi-clip bucket is one job; lone clips share jobs
+    jobs: list[list[tuple[str, int, Path]]] = []
+    singles: list[tuple[str, int, Path]] = []
+    for key, clips in buckets.items():
+        items = [(p, key, norm_dir / f"lnorm_{key:+04d}_c{i:05d}.mp4") for i, p in enumerate(clips)]
+        if len(items) > 1:
+            jobs.append(items)
+        else:
+            singles.extend(items)
+    for i in range(0, len(singles), _LUMA_MULTI_MAX):
+        jobs.append(singles[i:i + _LUMA_MULTI_MAX])
 
-    # Parallel luma encoding
+    # Parallel luma encoding, one task per job
     norm_cache: dict[str, str] = {}
-    if encode_jobs:
-        total_enc = len(encode_jobs)
-        print(f"  luma encode: 0/{total_enc}", end="", flush=True)
+    if jobs:
+        total_enc = sum(len(items) for items in jobs)
+        print(f"  luma encode: 0/{total_enc} ({len(jobs)} batches)", end="", flush=True)
         done_enc = 0
 
-        def _encode_one(args: tuple[int, str, float]) -> tuple[str, str | None, float]:
-            idx, clip_path, delta = args
-            brightness = (delta / 255.0) * strength
-            brightness = max(-1.0, min(1.0, brightness))
-            out_path = norm_dir / f"lnorm_{idx:05d}.mp4"
+        def _encode_clip(clip_path: str, brightness: float, out_path: Path) -> bool:
             cmd = [
                 ffmpeg, "-y",
+                "-thread_queue_size", str(config.ffmpeg_thread_queue_size),
                 "-i", clip_path,
                 "-vf", f"eq=brightness={brightness:.4f}",
-                "-c:v", config.codec,
-                "-preset", config.preset,
+                "-threads", str(config.encoder_threads(config.encode_workers)),
+                *encoder_args(config.codec, config.preset, config.hw_encoder),
                 "-g", "1",
                 "-bf", "0",
                 "-an",
                 str(out_path),
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            if result.returncode != 0:
-                return clip_path, None, delta
-            # Estimate new luma from adjustment
-            new_luma = luma_cache.get(clip_path, 128.0) + delta * strength
-            return clip_path, str(out_path), new_luma
-
-        with ThreadPoolExecutor(max_workers=config.max_workers) as pool:
-            futures = []
-            for idx, (clip_path, delta) in enumerate(encode_jobs):
-                futures.append(pool.submit(_encode_one, (idx, clip_path, delta)))
-            for future in as_completed(futures):
-                orig_path, out_path, new_luma = future.result()
+            try:
+                result = run_ffmpeg(cmd, timeout=config.ffmpeg_timeout or 60)
+            except subprocess.TimeoutExpired:
+                return False
+            return result.returncode == 0
+
+        def _encode_job(items: list[tuple[str, int, Path]]) -> list[tuple[str, str | None, float]]:
+            clips = [p for p, _, _ in items]
+            key = items[0][1]
+            if all(k == key for _, k, _ in items):
+                if len(items) > 1 and all(p in clip_frames for p in clips):
+                    outputs = _encode_luma_batch(
+                        clips, key * _LUMA_BUCKET_STEP, [clip_frames[p] for p in clips],
+                        norm_dir, key, config, ffmpeg,
+                    )
+                    if outputs is not None:
+                        return [(p, out, key * _LUMA_BUCKET_STEP) for p, out in zip(clips, outputs)]
+            elif _encode_luma_multi(items, config, ffmpeg):
+                return [(p, str(out), k * _LUMA_BUCKET_STEP) for p, k, out in items]
+
+            # Single clip, unknown frame counts, or batch failure: one process per clip
+            results = []
+            for clip_path, k, out_path in items:
+                ok = _encode_clip(clip_path, k * _LUMA_BUCKET_STEP, out_path)
+                results.append((clip_path, str(out_path) if ok else None, k * _LUMA_BUCKET_STEP))
+            return results
+
+        # Encodes saturate cores on their own; cap concurrency below the pool size
+        for results in _bounded_map(pool, _encode_job, jobs, config.encode_workers):
+            for orig_path, out_path, brightness in results:
                 if out_path is not None:
                     norm_cache[orig_path] = out_path
-                    luma_cache[out_path] = new_luma
-                done_enc += 1
-                if done_enc % 200 == 0 or done_enc == total_enc:
-                    print(f"\r  luma encode: {done_enc}/{total_enc}", end="", flush=True)
+                    # Estimate new luma from adjustment
+                    luma_cache[out_path] = luma_cache.get(orig_path, 128.0) + brightness * 255.0
+            done_enc += len(results)
+            print(f"\r  luma encode: {done_enc}/{total_enc} ({len(jobs)} batches)", end="", flush=True)
 
         print()  # newline after progress
 
-    # Build final sequence using norm_cache
-    for clip_path in sequence:
-        if clip_path in norm_cache:
-            normalized.append(norm_cache[clip_path])
-        else:
-            normalized.append(clip_path)
+    # Build final sequence once every unique clip has been planned and encoded
+    return [norm_cache.get(p, p) for p in sequence], norm_cache
 
-    return normalized, norm_cache
 
-
-def _count_expected_frames(
+def _assemble_fused(
     sequence: list[str],
-    chunk_frame_map: dict[str, int],
-    image_frame_map: dict[str, int],
-    norm_frame_map: dict[str, int],
+    config: SplicerConfig,
+    luma_cache: dict[str, float],
     buffer_path: str | None,
+    clip_frames: dict[str, int],
+    output_path: Path,
+) -> bool:
+    """Luma-normalize and concatenate the whole sequence in one ffmpeg filter graph.
+
+    Each clip gets its own eq=brightness chain and buffer frames come from an
+    in-graph color source, so no intermediate files are written. On success,
+    luma_cache entries for shifted clips are updated to their estimated output
+    luma. Returns False when no clip needs a shift (plain stream-copy concat is
+    cheaper) or ffmpeg fails.
+    """
+    ffmpeg = ffmpeg_bin()
+
+    buckets = _luma_buckets(
+        list(dict.fromkeys(sequence)), luma_cache, clip_frames,
+        config.antistrobe_luma_strength,
+    )
+    shift = {p: key * _LUMA_BUCKET_STEP for key, clips in buckets.items() for p in clips}
+    if not shift:
+        return False
+
+    w, h, fps = config.width, config.height, config.target_fps
+    buffer_duration = config.antistrobe_buffer_frames / fps
+    inputs: list[str] = []
+    chains: list[str] = []
+    n_inputs = 0
+    eq_count = 0
+    for i, p in enumerate(sequence):
+        if p == buffer_path:
+            src = (
+                f"color=c=0x808080:s={w}x{h}:r={fps}:d={buffer_duration},"
+                f"format={config.target_pix_fmt}"
+            )
+        else:
+            # concat needs matching SAR across segments; the color source is 1:1
+            src = f"[{n_inputs}:v]setsar=1"
+            # Every clip is its own input and all decoders open at once; one
+            # thread each keeps a long sequence from spawning thousands
+            inputs += [
+                "-threads", "1",
+                "-thread_queue_size", str(config.ffmpeg_thread_queue_size),
+                "-i", p,
+            ]
+            n_inputs += 1
+        # The buffer is shifted like any clip, as _luma_normalize re-encodes it
+        if p in shift:
+            chains.append(f"{src},eq=brightness={shift[p]:.4f}[v{i}]")
+            eq_count += 1
+        else:
+            chains.append(f"{src}[v{i}]")
+    pads = "".join(f"[v{i}]" for i in range(len(sequence)))
+    chains.append(f"{pads}concat=n={len(sequence)}:v=1:a=0,format={config.target_pix_fmt}[out]")
+
+    cmd = [
+        ffmpeg, "-y",
+        *inputs,
+        "-filter_complex", ";".join(chains),
+        "-map", "[out]",
+        "-threads", str(config.encoder_threads()),
+        "-colorspace", config.target_colorspace,
+        "-color_primaries", config.color_primaries,
+        "-color_trc", config.color_trc,
+        *encoder_args(config.codec, config.preset, config.hw_encoder),
+        "-g", "1",
+        "-bf", "0",
+        "-an",
+        str(output_path),
+    ]
+
+    total = sum(clip_frames.get(p, 0) for p in sequence)
+    print(f"  fused assembly: {len(sequence)} entries, {eq_count} luma-shifted -> {output_path.name}")
+    try:
+        result = run_ffmpeg(cmd, timeout=config.ffmpeg_timeout or max(600, total // 10))
+    except subprocess.TimeoutExpired:
+        result = None
+    if result is None or result.returncode != 0:
+        print("  fused assembly failed, normalizing per clip")
+        return False
+
+    for p, brightness in shift.items():
+        luma_cache[p] = luma_cache[p] + brightness * 255.0
+    return True
+
+
+def _encode_luma_multi(
+    items: list[tuple[str, int, Path]],
+    config: SplicerConfig,
+    ffmpeg: str,
+) -> bool:
+    """Re-encode clips with differing brightness in one ffmpeg process.
+
+    Each (clip, bucket key, out_path) item is its own input and output of a
+    single filter graph, amortizing process startup over the whole group.
+    """
+    queue = str(config.ffmpeg_thread_queue_size)
+    threads = str(config.encoder_threads(config.encode_workers))
+    inputs: list[str] = []
+    chains: list[str] = []
+    outputs: list[str] = []
+    for i, (clip_path, key, out_path) in enumerate(items):
+        inputs += ["-thread_queue_size", queue, "-i", clip_path]
+        chains.append(f"[{i}:v]eq=brightness={key * _LUMA_BUCKET_STEP:.4f}[o{i}]")
+        outputs += [
+            "-map", f"[o{i}]",
+            "-threads", threads,
+            *encoder_args(config.codec, config.preset, config.hw_encoder),
+            "-g", "1",
+            "-bf", "0",
+            "-an",
+            str(out_path),
+        ]
+
+    cmd = [ffmpeg, "-y", *inputs, "-filter_complex", ";".join(chains), *outputs]
+    try:
+        result = run_ffmpeg(cmd, timeout=config.ffmpeg_timeout or max(60, 15 * len(items)))
+    except subprocess.TimeoutExpired:
+        return False
+    return result.returncode == 0
+
+
+def _encode_luma_batch(
+    clips: list[str],
+    brightness: float,
+    frame_counts: list[int],
+    out_dir: Path,
+    key: int,
     config: SplicerConfig,
-) -> int:
-    """Compute expected frame count from metadata — no subprocess calls."""
+    ffmpeg: str,
+) -> list[str] | None:
+    """Re-encode clips sharing one brightness adjustment in a single ffmpeg run.
+
+    The clips are joined with the concat demuxer and split back apart by the
+    segment muxer at their known frame boundaries — every frame is a keyframe
+    (-g 1), so each split lands exactly. Returns output paths in clip order,
+    or None if the batch failed, produced the wrong number of segments, or any
+    segment's frame count differs from its clip's — a clip whose real length
+    disagrees with its metadata would shift every later clip across a
+    boundary, so the caller falls back to per-clip encodes.
+    """
+    list_path = out_dir / f"lnorm_{key:+04d}.txt"
+    _write_concat_file(clips, list_path)
+
+    boundaries = []
     total = 0
-    for path in sequence:
-        if buffer_path is not None and path == buffer_path:
-            total += config.antistrobe_buffer_frames
-        elif path in chunk_frame_map:
-            total += chunk_frame_map[path]
-        elif path in image_frame_map:
-            total += image_frame_map[path]
-        elif path in norm_frame_map:
-            total += norm_frame_map[path]
-        else:
-            # Truly unknown clip — probe as last resort
-            try:
-                info = probe(path)
-                total += info.frame_count
-            except Exception:
-                pass
-    return total
+    for frames in frame_counts[:-1]:
+        total += frames
+        boundaries.append(str(total))
+    total += frame_counts[-1]
+
+    pattern = out_dir / f"lnorm_{key:+04d}_%05d.mp4"
+    cmd = [
+        ffmpeg, "-y",
+        "-f", "concat",
+        "-safe", "0",
+        "-thread_queue_size", str(config.ffmpeg_thread_queue_size),
+        "-i", str(list_path),
+        "-vf", f"eq=brightness={brightness:.4f}",
+        "-threads", str(config.encoder_threads(config.encode_workers)),
+        *encoder_args(config.codec, config.preset, config.hw_encoder),
+        "-g", "1",
+        "-bf", "0",
+        "-an",
+        "-f", "segment",
+        "-segment_frames", ",".join(boundaries),
+        "-reset_timestamps", "1",
+        str(pattern),
+    ]
+
+    timeout = config.ffmpeg_timeout or max(60, total // 10)
+    try:
+        result = run_ffmpeg(cmd, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    if result.returncode != 0:
+        return None
+
+    outputs = [out_dir / f"lnorm_{key:+04d}_{i:05d}.mp4" for i in range(len(clips))]
+    overflow = out_dir / f"lnorm_{key:+04d}_{len(clips):05d}.mp4"
+    if not all(p.exists() for p in outputs) or overflow.exists():
+        return None
+    try:
+        if any(
+            probe(p, config.probe_timeout).frame_count != n
+            for p, n in zip(outputs, frame_counts)
+        ):
+            return None
+    except ProbeError:
+        return None
+    return [str(p) for p in outputs]
+
+
+def _count_expected_frames(
+    sequence: list[str], clip_frames: dict[str, int],
+) -> tuple[int, list[int]]:
+    """Compute expected frame count from metadata — no subprocess calls.
+
+    clip_frames covers chunks, images, the buffer clip and normalized outputs,
+    so each entry is a single lookup. Also returns the running totals:
+    cum_frames[i] is the output frame just past sequence position i.
+    """
+    missing = [p for p in dict.fromkeys(sequence) if p not in clip_frames]
+    if missing:
+        print(f"  warning: no frame count for {len(missing)} clip(s), e.g. {missing[0]}")
+    cum_frames = list(accumulate(map(clip_frames.get, sequence, repeat(0))))
+    return (cum_frames[-1] if cum_frames else 0), cum_frames
 
 
 def _write_concat_file(sequence: list[str], concat_path: Path) -> None:
@@ -362,19 +847,75 @@ def _write_concat_file(sequence: list[str], concat_path: Path) -> None:
 
     Uses newline="" to force Unix line endings on all platforms —
     ffmpeg's concat demuxer can choke on Windows CRLF.
+
+    Entries must already be absolute — assemble() canonicalizes every path
+    once up front — so each line is just the single-quote escape. The body is
+    joined and written in one call.
     """
+    body = "".join(
+        # Escape single quotes in paths
+        "file '" + path.replace("'", "'\\''") + "'\n"
+        for path in sequence
+    )
     with open(concat_path, "w", newline="\n") as f:
-        for path in sequence:
-            # Escape single quotes in paths
-            safe_path = str(Path(path).resolve()).replace("'", "'\\''")
-            f.write(f"file '{safe_path}'\n")
+        f.write(body)
+
+
+def _remux_to_ts(
+    sequence: list[str],
+    config: SplicerConfig,
+    work_dir: Path,
+    pool: Executor,
+) -> list[str]:
+    """Stream-copy every unique clip to MPEG-TS in parallel. Returns the sequence
+    rewritten to the .ts paths, or the original sequence if any remux fails."""
+    ffmpeg = ffmpeg_bin()
+
+    ts_dir = work_dir / "ts"
+    ts_dir.mkdir(exist_ok=True)
+    bsf = _annexb_bsf(config.codec)
+
+    unique_paths = list(dict.fromkeys(sequence))
+    ts_map = {p: str(ts_dir / f"seg_{i:05d}.ts") for i, p in enumerate(unique_paths)}
+
+    def _remux_one(path: str) -> bool:
+        cmd = [ffmpeg, "-y", "-i", path, "-c", "copy"]
+        if bsf:
+            cmd.extend(["-bsf:v", bsf])
+        cmd.extend(["-an", "-f", "mpegts", ts_map[path]])
+        try:
+            result = run_ffmpeg(cmd, timeout=config.ffmpeg_timeout or 60)
+        except subprocess.TimeoutExpired:
+            return False
+        return result.returncode == 0
+
+    print(f"  remuxing {len(unique_paths)} clips to MPEG-TS")
+    ok = all(list(_bounded_map(pool, _remux_one, unique_paths, config.max_workers * 2)))
+
+    if not ok:
+        print("  warning: MPEG-TS remux failed, concatenating mp4 clips directly")
+        return sequence
+    return [ts_map[p] for p in sequence]
 
 
-def _run_concat(concat_path: Path, output_path: Path, sequence_length: int = 0) -> None:
-    """Run ffmpeg concat demuxer to produce final output."""
-    ffmpeg = shutil.which("ffmpeg")
-    if ffmpeg is None:
-        raise RuntimeError("ffmpeg not found on PATH")
+def _annexb_bsf(codec: str) -> str | None:
+    """Bitstream filter converting mp4 (length-prefixed) video to Annex B for TS."""
+    codec = codec.lower()
+    if "265" in codec or "hevc" in codec:
+        return "hevc_mp4toannexb"
+    if "264" in codec or "h264" in codec:
+        return "h264_mp4toannexb"
+    return None
+
+
+def _run_concat(
+    concat_path: Path, output_path: Path, sequence_length: int = 0, timeout: float = 0,
+) -> None:
+    """Run ffmpeg concat demuxer to produce final output.
+
+    timeout 0 scales the limit with sequence_length.
+    """
+    ffmpeg = ffmpeg_bin()
 
     cmd = [
         ffmpeg, "-y",
@@ -385,39 +926,53 @@ def _run_concat(concat_path: Path, output_path: Path, sequence_length: int = 0)
         str(output_path),
     ]
 
-    timeout = max(600, 600 + sequence_length // 100)
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    result = run_ffmpeg(cmd, timeout=timeout or 600 + sequence_length // 100)
     if result.returncode != 0:
         raise RuntimeError(f"ffmpeg concat failed: {result.stderr[-2000:]}")
 
 
+def _link_or_copy(src: str, dst: Path) -> None:
+    """Hardlink src to dst, copying when linking is not possible (e.g. across filesystems)."""
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
 def _luma_delta_pass(
     sequence: list[str],
     config: SplicerConfig,
     manifest: Manifest,
     luma_cache: dict[str, float],
+    cum_frames: list[int],
 ) -> None:
-    """Post-assembly safety pass: flag adjacent clips with high luma delta."""
+    """Post-assembly safety pass: flag adjacent clips with high luma delta.
+
+    Pure arithmetic over luma_cache, which assemble fills before normalization;
+    no clips are probed here. Flags carry the output frame of the cut, read
+    from cum_frames (running frame totals per position).
+    """
     threshold = config.antistrobe_delta_threshold
     if threshold <= 0:
         return
 
-    # Probe any paths not already in the shared cache (e.g. luma-normalized clips)
-    uncached = list(set(p for p in sequence if p not in luma_cache))
-    if uncached:
-        _probe_luma_parallel(uncached, luma_cache, config.max_workers)
-
     print(f"  luma delta pass: checking {len(sequence) - 1} transitions")
 
-    for i in range(len(sequence) - 1):
-        luma_a = luma_cache.get(sequence[i], 128.0)
-        luma_b = luma_cache.get(sequence[i + 1], 128.0)
-        delta = abs(luma_a - luma_b)
-
-        if delta > threshold:
-            manifest.add_luma_flag(LumaFlag(
-                position=i,
-                delta=delta,
-                threshold=threshold,
-            ))
-            print(f"  luma warning: position {i}->{i+1} delta={delta:.1f} (threshold={threshold})")
+    # One lookup per entry, then a flat diff; only threshold crossings loop in Python
+    lumas = [luma_cache.get(p, 128.0) for p in sequence]
+    deltas = list(map(abs, map(operator.sub, lumas, lumas[1:])))
+    hits = [i for i, delta in enumerate(deltas) if delta > threshold]
+
+    for i in hits:
+        delta = deltas[i]
+        manifest.add_luma_flag(LumaFlag(
+            position=i,
+            delta=delta,
+            threshold=threshold,
+            output_frame=cum_frames[i],
+        ))
+        print(
+            f"  luma warning: position {i}->{i+1} (frame {cum_frames[i]}) "
+            f"delta={delta:.1f} (threshold={threshold})"
+        )
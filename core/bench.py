@@ -3,15 +3,14 @@
 import json
 import platform
 import random
-import shutil
-import subprocess
 import tempfile
 import time
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields, replace
 from datetime import datetime, timezone
 from pathlib import Path
 
 from .config import SplicerConfig
+from .ffmpeg import cached_output, ffmpeg_bin, run_ffmpeg
 from .platform import platform_check
 
 CALIBRATION_FILENAME = ".splicer_calibration.json"
@@ -48,13 +47,14 @@ class CalibrationData:
     timings: dict = field(default_factory=dict)
 
     def to_dict(self) -> dict:
-        d = asdict(self)
+        d = {f.name: getattr(self, f.name) for f in fields(self)}
         d["resolution"] = list(self.resolution)
+        d["timings"] = dict(self.timings)
         return d
 
     def save(self, path: Path) -> None:
         with open(path, "w") as f:
-            json.dump(self.to_dict(), f, indent=2)
+            json.dump(self.to_dict(), f, separators=(",", ":"))
         print(f"Calibration saved: {path}")
 
     @classmethod
@@ -97,7 +97,7 @@ def run_benchmark(config: SplicerConfig, verbose: bool = True) -> CalibrationDat
             print("\n--- Benchmark: probe ---")
         from .probe import probe
         t0 = time.perf_counter()
-        info = probe(synthetic)
+        info = probe(synthetic, config.probe_timeout)
         t_probe = time.perf_counter() - t0
         actual_frames = info.frame_count
         if verbose:
@@ -124,7 +124,7 @@ def run_benchmark(config: SplicerConfig, verbose: bool = True) -> CalibrationDat
         chunk_dir.mkdir()
         rng = random.Random(42)
         t0 = time.perf_counter()
-        chunks = chunk_video(norm_out, chunk_dir, config, rng, start_index=0)
+        chunks = chunk_video(norm_out, chunk_dir, config, rng, start_index=0, intra_only=True)
         t_chunk = time.perf_counter() - t0
         chunk_fps = actual_frames / t_chunk if t_chunk > 0 else 0
         cal.chunk_fps = round(chunk_fps, 1)
@@ -143,12 +143,16 @@ def run_benchmark(config: SplicerConfig, verbose: bool = True) -> CalibrationDat
 
         rng2 = random.Random(42)
         output = work / "bench_output.mp4"
+        # The short bench sequence would otherwise take the fused single-graph
+        # path; time the per-clip luma encode and concat that long runs use,
+        # since those are the stages the estimator scales
+        assemble_config = replace(config, antistrobe_fuse_max_entries=0)
 
         t0 = time.perf_counter()
         assemble(
             chunks=chunks,
             image_paths=[],
-            config=config,
+            config=assemble_config,
             rng=rng2,
             manifest=manifest,
             work_dir=work,
@@ -156,47 +160,18 @@ def run_benchmark(config: SplicerConfig, verbose: bool = True) -> CalibrationDat
         )
         t_assemble = time.perf_counter() - t0
 
-        # Derive sub-stage rates from assemble timing
-        # assemble internally does: luma probe + luma encode + concat
-        # We time these individually with small extra calls
         if verbose:
             print(f"  assemble: {t_assemble:.3f}s")
 
-        # Standalone luma probe timing
-        from .probe import probe_mean_luma
-        sample_chunk = chunks[0].chunk_path if chunks else str(norm_out)
-        t0 = time.perf_counter()
-        try:
-            probe_mean_luma(sample_chunk)
-        except Exception:
-            pass
-        t_luma_probe_single = time.perf_counter() - t0
-        sample_info = probe(sample_chunk)
-        sample_frames = sample_info.frame_count
-        luma_probe_fps = sample_frames / t_luma_probe_single if t_luma_probe_single > 0 else 450.0
+        # Sub-stage rates come from the timings assemble records in the manifest
+        stage_timings = manifest.stage_timings
+        luma_probe_fps = _stage_fps(stage_timings, "luma_probe", 450.0)
         cal.luma_probe_fps = round(luma_probe_fps, 1)
-
-        # Standalone luma encode timing (eq filter on single chunk)
-        ffmpeg = shutil.which("ffmpeg")
-        luma_enc_out = work / "luma_enc_bench.mp4"
-        t0 = time.perf_counter()
-        cmd = [
-            ffmpeg, "-y",
-            "-i", sample_chunk,
-            "-vf", "eq=brightness=0.05",
-            "-c:v", config.codec,
-            "-preset", config.preset,
-            "-g", "1", "-bf", "0", "-an",
-            str(luma_enc_out),
-        ]
-        subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        t_luma_encode_single = time.perf_counter() - t0
-        luma_encode_fps = sample_frames / t_luma_encode_single if t_luma_encode_single > 0 else 280.0
+        luma_encode_fps = _stage_fps(stage_timings, "luma_encode", 280.0)
         cal.luma_encode_fps = round(luma_encode_fps, 1)
 
-        # Concat fps — from assemble minus luma work, rough estimate
         total_output_frames = manifest.actual_frame_count or actual_frames
-        assemble_concat_fps = total_output_frames / max(t_assemble * 0.1, 0.001)
+        assemble_concat_fps = _stage_fps(stage_timings, "concat", 2000.0)
         cal.assemble_concat_fps = round(assemble_concat_fps, 1)
 
         if verbose:
@@ -229,65 +204,75 @@ def run_benchmark(config: SplicerConfig, verbose: bool = True) -> CalibrationDat
     return cal
 
 
+def _stage_fps(stage_timings: dict, stage: str, default: float) -> float:
+    """Frames per second for a recorded assembly stage, or default if not run."""
+    frames, seconds = stage_timings.get(stage, (0, 0.0))
+    if frames <= 0 or seconds <= 0:
+        return default
+    return frames / seconds
+
+
 def _generate_synthetic_clip(
     config: SplicerConfig, work_dir: Path, verbose: bool = True
 ) -> Path:
-    """Generate a ~10s synthetic clip with varied luma segments via lavfi."""
-    ffmpeg = shutil.which("ffmpeg")
-    if ffmpeg is None:
-        raise RuntimeError("ffmpeg not found on PATH")
+    """Generate a ~10s synthetic clip with varied luma segments via lavfi.
+
+    All segments are lavfi inputs of one ffmpeg process, joined by a concat
+    filter and encoded once — no per-segment files. With config.cache_dir set
+    the clip is generated once per encode settings and reused.
+    """
+    if config.cache_dir:
+        key = repr((
+            config.width, config.height, config.target_fps, config.target_pix_fmt,
+            config.target_colorspace, config.codec, config.preset, _SEGMENTS,
+            _SEGMENT_DURATION,
+        ))
+        return cached_output(
+            config.cache_dir, "bench_synthetic", key,
+            lambda path: _encode_synthetic_clip(config, path, verbose),
+        )
+    output = work_dir / "bench_synthetic.mp4"
+    _encode_synthetic_clip(config, output, verbose)
+    return output
+
+
+def _encode_synthetic_clip(config: SplicerConfig, output: Path, verbose: bool) -> None:
+    """Encode the lavfi test segments, concatenated, to output."""
+    ffmpeg = ffmpeg_bin()
 
     w, h = config.width, config.height
     fps = config.target_fps
     seg_duration = _SEGMENT_DURATION
+    queue = str(config.ffmpeg_thread_queue_size)
 
-    segment_paths = []
+    input_args: list[str] = []
     for name, template in _SEGMENTS:
-        seg_path = work_dir / f"bench_seg_{name}.mp4"
-
         if "mandelbrot" in template:
             lavfi = template.format(w=w, h=h, fps=fps)
-            input_args = ["-f", "lavfi", "-i", lavfi, "-t", str(seg_duration)]
+            input_args += ["-f", "lavfi", "-t", str(seg_duration), "-thread_queue_size", queue, "-i", lavfi]
         else:
             lavfi = template.format(w=w, h=h, fps=fps, d=seg_duration)
-            input_args = ["-f", "lavfi", "-i", lavfi]
-
-        cmd = [
-            ffmpeg, "-y",
-            *input_args,
-            "-vf", f"format={config.target_pix_fmt}",
-            "-colorspace", config.target_colorspace,
-            "-color_primaries", config.color_primaries,
-            "-color_trc", config.color_trc,
-            "-c:v", config.codec,
-            "-preset", config.preset,
-            "-g", "1", "-bf", "0", "-an",
-            str(seg_path),
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        if result.returncode != 0:
-            raise RuntimeError(f"Failed to generate {name} segment: {result.stderr[-500:]}")
-        segment_paths.append(seg_path)
+            input_args += ["-f", "lavfi", "-thread_queue_size", queue, "-i", lavfi]
         if verbose:
             print(f"  segment: {name}")
 
-    # Concat segments
-    concat_list = work_dir / "bench_concat.txt"
-    with open(concat_list, "w", newline="\n") as f:
-        for p in segment_paths:
-            safe = str(p.resolve()).replace("'", "'\\''")
-            f.write(f"file '{safe}'\n")
+    pads = "".join(f"[{i}:v]" for i in range(len(_SEGMENTS)))
+    graph = f"{pads}concat=n={len(_SEGMENTS)}:v=1:a=0,format={config.target_pix_fmt}[v]"
 
-    output = work_dir / "bench_synthetic.mp4"
     cmd = [
         ffmpeg, "-y",
-        "-f", "concat", "-safe", "0",
-        "-i", str(concat_list),
-        "-c", "copy",
+        *input_args,
+        "-filter_complex", graph,
+        "-map", "[v]",
+        "-threads", str(config.encoder_threads()),
+        "-colorspace", config.target_colorspace,
+        "-color_primaries", config.color_primaries,
+        "-color_trc", config.color_trc,
+        "-c:v", config.codec,
+        "-preset", config.preset,
+        "-g", "1", "-bf", "0", "-an",
         str(output),
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    result = run_ffmpeg(cmd, timeout=config.ffmpeg_timeout or 300)
     if result.returncode != 0:
-        raise RuntimeError(f"Failed to concat benchmark segments: {result.stderr[-500:]}")
-
-    return output
+        raise RuntimeError(f"Failed to generate synthetic clip: {result.stderr[-500:]}")
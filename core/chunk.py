@@ -1,13 +1,13 @@
 """Frame-accurate chunk extraction with seeded random durations."""
 
 import random
-import shutil
 import subprocess
 from dataclasses import dataclass
 from pathlib import Path
 
 from .config import SplicerConfig
-from .probe import probe
+from .ffmpeg import encoder_args, ffmpeg_bin, run_ffmpeg
+from .probe import ProbeError, probe
 
 
 @dataclass
@@ -20,66 +20,184 @@ class ChunkInfo:
     chunk_index: int
 
 
+def draw_sub_seeds(rng: random.Random, count: int) -> list[int]:
+    """Draw `count` 31-bit per-video sub-seeds from rng in a single call.
+
+    One getrandbits() of 31*count bits is sliced into seeds, so the main
+    stream advances once regardless of how many videos there are.
+    """
+    if count <= 0:
+        return []
+    bits = rng.getrandbits(31 * count)
+    mask = (1 << 31) - 1
+    return [(bits >> (31 * i)) & mask for i in range(count)]
+
+
 def chunk_video(
     normalized_path: str | Path,
     output_dir: str | Path,
     config: SplicerConfig,
     rng: random.Random,
     start_index: int = 0,
+    intra_only: bool = False,
 ) -> list[ChunkInfo]:
     """Split a normalized video into frame-accurate chunks.
 
     Returns a list of ChunkInfo describing each extracted chunk.
     start_index offsets chunk numbering (for multi-source pipelines).
+    intra_only=True declares every input frame a keyframe (normalize_video
+    output is -g 1 -bf 0), letting chunks be stream-copied instead of re-encoded.
     """
     normalized_path = Path(normalized_path)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
+    # Resolve once so every chunk_path is absolute without a per-chunk resolve()
+    output_dir = output_dir.resolve()
 
-    info = probe(normalized_path)
+    info = probe(normalized_path, config.probe_timeout)
     total_frames = info.frame_count
 
     if total_frames <= 0:
         print(f"  warning: {normalized_path.name} has 0 frames, skipping")
         return []
 
-    chunks: list[ChunkInfo] = []
-    current_frame = 0
-    chunk_idx = start_index
+    plan = _plan_chunks(total_frames, config, rng)
+    chunk_paths = [
+        output_dir / f"chunk_{start_index + i:05d}.mp4" for i in range(len(plan))
+    ]
+
+    # One pass over the whole video: stream copy when every frame is a keyframe,
+    # else one re-encode; per-chunk trim extraction as the last resort
+    segmented = bool(plan) and (
+        (intra_only and _extract_chunks_segmented(
+            normalized_path, chunk_paths, plan, start_index, config, copy=True,
+        ))
+        or _extract_chunks_segmented(
+            normalized_path, chunk_paths, plan, start_index, config, copy=False,
+        )
+    )
+    if not segmented:
+        for (start_frame, duration), chunk_path in zip(plan, chunk_paths):
+            _extract_chunk(
+                input_path=normalized_path,
+                output_path=chunk_path,
+                start_frame=start_frame,
+                end_frame=start_frame + duration,
+                config=config,
+            )
+
+    chunks = [
+        ChunkInfo(
+            source_file=str(normalized_path),
+            start_frame=start_frame,
+            frame_count=duration,
+            chunk_path=str(chunk_path),
+            chunk_index=start_index + i,
+        )
+        for i, ((start_frame, duration), chunk_path) in enumerate(zip(plan, chunk_paths))
+    ]
 
-    while current_frame < total_frames:
-        # Random duration within configured range
-        duration = rng.randint(config.chunk_frames_min, config.chunk_frames_max)
+    return chunks
+
+
+def _plan_chunks(
+    total_frames: int,
+    config: SplicerConfig,
+    rng: random.Random,
+) -> list[tuple[int, int]]:
+    """Lay out (start_frame, frame_count) chunks covering total_frames.
 
+    Every duration the video could need is drawn in one rng.choices call; a
+    tail shorter than chunk_frames_min is dropped.
+    """
+    max_chunks = total_frames // max(1, config.chunk_frames_min) + 1
+    durations = rng.choices(
+        range(config.chunk_frames_min, config.chunk_frames_max + 1),
+        k=max_chunks,
+    )
+
+    plan: list[tuple[int, int]] = []
+    current_frame = 0
+    for duration in durations:
         # Clamp to remaining frames
         remaining = total_frames - current_frame
-        if remaining < config.chunk_frames_min:
+        if remaining < config.chunk_frames_min or remaining <= 0:
             break  # Not enough frames for a valid chunk
         duration = min(duration, remaining)
+        plan.append((current_frame, duration))
+        current_frame += duration
+    return plan
 
-        end_frame = current_frame + duration
-        chunk_path = output_dir / f"chunk_{chunk_idx:05d}.mp4"
-
-        _extract_chunk(
-            input_path=normalized_path,
-            output_path=chunk_path,
-            start_frame=current_frame,
-            end_frame=end_frame,
-            config=config,
-        )
 
-        chunks.append(ChunkInfo(
-            source_file=str(normalized_path),
-            start_frame=current_frame,
-            frame_count=duration,
-            chunk_path=str(chunk_path),
-            chunk_index=chunk_idx,
-        ))
+def _extract_chunks_segmented(
+    input_path: Path,
+    chunk_paths: list[Path],
+    plan: list[tuple[int, int]],
+    start_index: int,
+    config: SplicerConfig,
+    copy: bool = False,
+) -> bool:
+    """Extract every planned chunk in one ffmpeg pass via the segment muxer.
+
+    Every frame is a keyframe — the input's when copy=True, the -g 1 output's
+    otherwise — so the muxer cuts exactly at the planned frame boundaries.
+    Returns False if ffmpeg fails or the cut does not match the plan: a file
+    missing, an extra segment past the last chunk, or a last chunk of the
+    wrong length.
+    """
+    ffmpeg = ffmpeg_bin()
+    overflow = chunk_paths[0].parent / f"chunk_{start_index + len(plan):05d}.mp4"
+    # Clear leftovers of an earlier run so existence checks reflect this one
+    for p in (*chunk_paths, overflow):
+        p.unlink(missing_ok=True)
+
+    planned_frames = plan[-1][0] + plan[-1][1]
+    if copy:
+        codec_args = ["-c:v", "copy"]
+    else:
+        codec_args = [
+            "-threads", str(config.encoder_threads(config.max_workers)),
+            *encoder_args(config.codec, config.preset, config.hw_encoder),
+            "-g", "1", "-bf", "0",
+        ]
+    if len(plan) > 1:
+        output_args = [
+            "-f", "segment",
+            "-segment_frames", ",".join(str(start) for start, _ in plan[1:]),
+            "-segment_start_number", str(start_index),
+            "-reset_timestamps", "1",
+            str(chunk_paths[0].parent / "chunk_%05d.mp4"),
+        ]
+    else:
+        output_args = [str(chunk_paths[0])]
 
-        current_frame = end_frame
-        chunk_idx += 1
+    cmd = [
+        ffmpeg, "-y",
+        "-thread_queue_size", str(config.ffmpeg_thread_queue_size),
+        "-i", str(input_path),
+        "-frames:v", str(planned_frames),
+        *codec_args,
+        "-an",
+        *output_args,
+    ]
 
-    return chunks
+    try:
+        result = run_ffmpeg(cmd, timeout=config.ffmpeg_timeout or max(120, planned_frames // 10))
+    except subprocess.TimeoutExpired:
+        return False
+    if result.returncode != 0:
+        return False
+    if overflow.exists():
+        overflow.unlink(missing_ok=True)
+        return False
+    if not all(p.exists() for p in chunk_paths):
+        return False
+    # A cut landing off its planned frame shifts every later boundary, which
+    # the last chunk's length exposes
+    try:
+        return probe(chunk_paths[-1], config.probe_timeout).frame_count == plan[-1][1]
+    except ProbeError:
+        return False
 
 
 def _extract_chunk(
@@ -90,25 +208,24 @@ def _extract_chunk(
     config: SplicerConfig,
 ) -> None:
     """Extract a frame-accurate chunk using the trim filter."""
-    ffmpeg = shutil.which("ffmpeg")
-    if ffmpeg is None:
-        raise RuntimeError("ffmpeg not found on PATH")
+    ffmpeg = ffmpeg_bin()
 
     vf = f"trim=start_frame={start_frame}:end_frame={end_frame},setpts=PTS-STARTPTS"
 
     cmd = [
         ffmpeg, "-y",
+        "-thread_queue_size", str(config.ffmpeg_thread_queue_size),
         "-i", str(input_path),
         "-vf", vf,
-        "-c:v", config.codec,
-        "-preset", config.preset,
+        "-threads", str(config.encoder_threads(config.max_workers)),
+        *encoder_args(config.codec, config.preset, config.hw_encoder),
         "-g", "1",
         "-bf", "0",
         "-an",
         str(output_path),
     ]
 
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+    result = run_ffmpeg(cmd, timeout=config.ffmpeg_timeout or 120)
     if result.returncode != 0:
         raise RuntimeError(
             f"ffmpeg chunk extraction failed:\n"
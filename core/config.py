@@ -1,8 +1,9 @@
 """All pipeline parameters as a single dataclass."""
 
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, fields
 from typing import Optional, Tuple, Literal
 import json
+import os
 
 
 @dataclass
@@ -17,6 +18,7 @@ class SplicerConfig:
     # --- codec ---
     codec: str = "libx264"
     preset: str = "fast"
+    hw_encoder: str = ""                    # "" = software codec, "auto" = detect, or an ffmpeg encoder name
 
     # --- chunk timing (in frames) ---
     chunk_frames_min: int = 3
@@ -31,12 +33,25 @@ class SplicerConfig:
     antistrobe_buffer_frames: int = 1       # 0 = off, 1+ = gray frames between cuts
     antistrobe_luma_strength: float = 0.5   # 0.0 = off, 1.0 = full normalization
     antistrobe_delta_threshold: int = 80    # luma delta flag threshold (0-255)
+    antistrobe_trust_estimates: bool = True # False = re-probe luma-normalized clips for delta pass
+    antistrobe_fuse_max_entries: int = 200  # single filter-graph assembly up to this many entries (0 = off)
+
+    # --- output ---
+    verify_output: bool = True              # False = skip final ffprobe, trust expected frame count
+    output_checksum: str = "sha256"         # "sha256" | "sha256-tree" (parallel leaf hashes, for multi-GB outputs)
 
     # --- prep mode ---
     grain_duration: int = 60                # target segment length in seconds for grain
 
     # --- parallelism ---
     max_workers: int = 4                    # thread pool size for normalize/chunk/luma
+    max_parallel_encodes: int = 0           # concurrent luma re-encodes (0 = cpu_count // 2)
+    ffmpeg_threads: int = 0                 # -threads per encode (0 = split cores across concurrent encodes)
+    ffmpeg_thread_queue_size: int = 8       # -thread_queue_size per ffmpeg input
+
+    # --- subprocess timeouts (seconds) ---
+    probe_timeout: int = 30                 # per ffprobe run
+    ffmpeg_timeout: int = 0                 # per ffmpeg run, every stage (0 = built-in per-stage defaults)
 
     # --- reproducibility ---
     rng_seed: Optional[int] = None          # None = random, int = reproducible
@@ -44,6 +59,7 @@ class SplicerConfig:
     # --- paths ---
     output_dir: str = "output"
     temp_dir: str = ""  # empty = auto temp dir
+    cache_dir: str = ""  # empty = no persistent cache; else generated clips reused across runs
 
     # --- colorspace helpers ---
     @property
@@ -54,6 +70,25 @@ class SplicerConfig:
     def color_trc(self) -> str:
         return "smpte170m" if self.target_colorspace == "smpte170m" else "bt709"
 
+    @property
+    def encode_workers(self) -> int:
+        """Concurrent luma re-encodes; each ffmpeg encode is itself multithreaded."""
+        if self.max_parallel_encodes > 0:
+            return self.max_parallel_encodes
+        return max(1, (os.cpu_count() or 2) // 2)
+
+    def encoder_threads(self, concurrency: int = 1) -> int:
+        """ffmpeg -threads for one of `concurrency` simultaneous encodes.
+
+        0 lets a lone encode pick its own count; parallel encodes share the
+        cores so the outer pool and the encoder threads don't oversubscribe.
+        """
+        if self.ffmpeg_threads > 0:
+            return self.ffmpeg_threads
+        if concurrency > 1:
+            return max(1, (os.cpu_count() or 2) // concurrency)
+        return 0
+
     @property
     def width(self) -> int:
         return self.target_resolution[0]
@@ -63,8 +98,8 @@ class SplicerConfig:
         return self.target_resolution[1]
 
     def to_dict(self) -> dict:
-        d = asdict(self)
-        return d
+        # Every field is a primitive or a tuple of ints — no deep copy needed
+        return {f.name: getattr(self, f.name) for f in fields(self)}
 
     def to_json(self, indent: int = 2) -> str:
         return json.dumps(self.to_dict(), indent=indent)
@@ -1,13 +1,15 @@
 """Dry-run estimator — probe inputs and predict pipeline time and output size."""
 
+import functools
 import json
 import math
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
 from .config import SplicerConfig
-from .probe import probe, ProbeError
+from .probe import PROBE_TIMEOUT, probe, ProbeCache, ProbeError, ProbeResult
 
 # Conservative default rates (pessimistic — used when no calibration file exists)
 DEFAULT_RATES = {
@@ -24,11 +26,15 @@ DEFAULT_RATES = {
 _PROBE_TIME_VIDEO = 0.15
 _PROBE_TIME_IMAGE = 0.10
 
-IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".tif", ".webp"}
-VIDEO_EXTENSIONS = {
+IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".tif", ".webp"})
+VIDEO_EXTENSIONS = frozenset({
     ".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v",
     ".mpg", ".mpeg", ".ts", ".gif",
-}
+})
+
+# Suffix tuples for str.endswith — one C-level scan, no Path.suffix parsing
+_IMAGE_SUFFIXES = tuple(IMAGE_EXTENSIONS)
+_VIDEO_SUFFIXES = tuple(VIDEO_EXTENSIONS)
 
 
 @dataclass
@@ -37,8 +43,24 @@ class InputStats:
     image_count: int = 0
     total_video_frames: int = 0
     total_video_duration: float = 0.0
-    video_details: list[dict] = field(default_factory=list)
+    frame_counts: list[int] = field(default_factory=list)   # per video, input order
     skipped: list[str] = field(default_factory=list)
+    # Probed videos, input order; video_details is derived from these on demand
+    videos: list[tuple[Path, ProbeResult]] = field(default_factory=list, repr=False)
+
+    @functools.cached_property
+    def video_details(self) -> list[dict]:
+        """Per-video summary dicts, built on first access — estimate() never needs them."""
+        return [
+            {
+                "name": p.name,
+                "frames": info.frame_count,
+                "duration": round(info.duration, 2),
+                "resolution": f"{info.width}x{info.height}",
+                "fps": info.fps,
+            }
+            for p, info in self.videos
+        ]
 
 
 @dataclass
@@ -135,19 +157,25 @@ def load_calibration(path: Optional[Path] = None) -> tuple[dict, str]:
     search_paths = [path] if path.name != _CF else [path, Path.cwd() / _CF]
 
     for p in search_paths:
-        if p.exists():
-            try:
-                with open(p) as f:
-                    data = json.load(f)
-                if data.get("splicer_calibration_version"):
-                    source = f"calibration file: {p}"
-                    return data, source
-            except (json.JSONDecodeError, OSError):
-                pass
+        try:
+            st = p.stat()
+            data = _read_calibration(str(p), st.st_mtime_ns, st.st_size)
+        except (json.JSONDecodeError, OSError):
+            continue
+        if data.get("splicer_calibration_version"):
+            source = f"calibration file: {p}"
+            return dict(data), source
 
     return dict(DEFAULT_RATES), "conservative defaults (no calibration file — run --benchmark)"
 
 
+@functools.lru_cache(maxsize=4)
+def _read_calibration(path: str, mtime_ns: int, size: int) -> dict:
+    """Parsed calibration file, cached until the file changes (callers copy it)."""
+    with open(path) as f:
+        return json.load(f)
+
+
 # Shared calibration filename for cross-module reference
 CALIBRATION_FILENAME = ".splicer_calibration.json"
 
@@ -156,8 +184,13 @@ def estimate(
     input_paths: list[Path],
     config: SplicerConfig,
     calibration_path: Optional[Path] = None,
+    probe_cache: Optional[ProbeCache] = None,
 ) -> Estimate:
-    """Probe all inputs and produce a pipeline estimate."""
+    """Probe all inputs and produce a pipeline estimate.
+
+    With probe_cache, probes are read from and recorded into it, so the real
+    run that follows a dry run does not probe the same files again.
+    """
     cal_data, cal_source = load_calibration(calibration_path)
 
     # Resolution scaling factor
@@ -178,14 +211,17 @@ def estimate(
     bytes_per_frame = cal_data.get("bytes_per_frame", DEFAULT_RATES["bytes_per_frame"]) * res_scale
 
     # Probe all inputs
-    stats = _probe_inputs(input_paths)
+    stats = _probe_inputs(input_paths, config.max_workers, probe_cache, config.probe_timeout)
 
     avg_chunk_frames = (config.chunk_frames_min + config.chunk_frames_max) / 2.0
     avg_image_frames = (config.image_frames_min + config.image_frames_max) / 2.0
     workers = config.max_workers
 
-    # Chunk count estimate
-    estimated_chunks = int(math.ceil(stats.total_video_frames / avg_chunk_frames)) if avg_chunk_frames > 0 else 0
+    # Chunk count estimate — each video is chunked separately, so round per file
+    estimated_chunks = (
+        sum(math.ceil(frames / avg_chunk_frames) for frames in stats.frame_counts)
+        if avg_chunk_frames > 0 else 0
+    )
 
     # Frame counts
     content_frames = stats.total_video_frames
@@ -251,60 +287,72 @@ def estimate(
     return est
 
 
-def _probe_inputs(input_paths: list[Path]) -> InputStats:
-    """Probe each input file and collect statistics."""
+def _probe_inputs(
+    input_paths: list[Path],
+    max_workers: int = 4,
+    probe_cache: Optional[ProbeCache] = None,
+    timeout: float = PROBE_TIMEOUT,
+) -> InputStats:
+    """Probe each input file and collect statistics.
+
+    Each probe blocks on its own ffprobe subprocess, so they run on a thread
+    pool; results are folded in input order.
+    """
     stats = InputStats()
-
-    for p in input_paths:
-        ext = p.suffix.lower()
-        if ext in IMAGE_EXTENSIONS:
-            try:
-                probe(p)
-                stats.image_count += 1
-            except ProbeError as e:
-                stats.skipped.append(f"{p.name}: {e}")
-        elif ext in VIDEO_EXTENSIONS:
-            try:
-                info = probe(p)
-                stats.video_count += 1
-                stats.total_video_frames += info.frame_count
-                stats.total_video_duration += info.duration
-                stats.video_details.append({
-                    "name": p.name,
-                    "frames": info.frame_count,
-                    "duration": round(info.duration, 2),
-                    "resolution": f"{info.width}x{info.height}",
-                    "fps": info.fps,
-                })
-            except ProbeError as e:
-                stats.skipped.append(f"{p.name}: {e}")
-        else:
-            stats.skipped.append(f"{p.name}: unsupported extension")
+    probe_fn = probe_cache.probe if probe_cache is not None else probe
+
+    def _probe_one(p: Path) -> tuple[bool, ProbeResult | None, str | None]:
+        """(is_image, probe result, error) for one input."""
+        name = p.name.lower()
+        is_image = name.endswith(_IMAGE_SUFFIXES)
+        if not is_image and not name.endswith(_VIDEO_SUFFIXES):
+            return False, None, "unsupported extension"
+        try:
+            return is_image, probe_fn(p, timeout), None
+        except ProbeError as e:
+            return is_image, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = list(pool.map(_probe_one, input_paths))
+
+    # Every outcome is known up front, so each list is built in one pass
+    stats.skipped = [
+        f"{p.name}: {error}" for p, (_, _, error) in zip(input_paths, results) if error is not None
+    ]
+    probed = [
+        (p, is_image, info)
+        for p, (is_image, info, error) in zip(input_paths, results) if error is None
+    ]
+    videos = [(p, info) for p, is_image, info in probed if not is_image]
+    stats.image_count = len(probed) - len(videos)
+    stats.video_count = len(videos)
+    stats.frame_counts = [info.frame_count for _, info in videos]
+    stats.total_video_frames = sum(stats.frame_counts)
+    stats.total_video_duration = sum((info.duration for _, info in videos), 0.0)
+    stats.videos = videos
 
     return stats
 
 
+# (threshold, unit, decimals), largest first
+_BYTE_UNITS = ((1 << 30, "GB", 2), (1 << 20, "MB", 1), (1 << 10, "KB", 1))
+
+# (threshold, unit, sub-unit size, sub-unit), largest first
+_TIME_UNITS = ((3600, "h", 60, "m"), (60, "m", 1, "s"))
+
+
 def _format_bytes(n: int) -> str:
     """Human-readable byte size."""
-    if n < 1024:
-        return f"{n} B"
-    elif n < 1024 ** 2:
-        return f"{n / 1024:.1f} KB"
-    elif n < 1024 ** 3:
-        return f"{n / (1024 ** 2):.1f} MB"
-    else:
-        return f"{n / (1024 ** 3):.2f} GB"
+    for size, unit, decimals in _BYTE_UNITS:
+        if n >= size:
+            return f"{n / size:.{decimals}f} {unit}"
+    return f"{n} B"
 
 
 def _format_time(seconds: float) -> str:
     """Human-readable time duration."""
-    if seconds < 60:
-        return f"{seconds:.1f}s"
-    elif seconds < 3600:
-        m = int(seconds // 60)
-        s = seconds % 60
-        return f"{m}m {s:.0f}s"
-    else:
-        h = int(seconds // 3600)
-        m = int((seconds % 3600) // 60)
-        return f"{h}h {m}m"
+    for size, unit, sub_size, sub_unit in _TIME_UNITS:
+        if seconds >= size:
+            major, rest = divmod(seconds, size)
+            return f"{int(major)}{unit} {int(rest // sub_size)}{sub_unit}"
+    return f"{seconds:.1f}s"
@@ -0,0 +1,195 @@
+"""ffmpeg subprocess helpers — cached tool lookup, bounded stderr capture for long encodes."""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Callable
+
+# Characters of stderr retained for error reporting
+STDERR_TAIL = 4096
+
+# Global options that silence the banner and per-frame progress line; stderr
+# then carries only errors, which is all run_ffmpeg callers report
+QUIET_ARGS = ("-hide_banner", "-nostats", "-loglevel", "error")
+_READ_SIZE = 8192
+
+# Resolved tool paths; PATH is walked once per tool per process
+_tool_paths: dict[str, str] = {}
+
+# Hardware encoders tried for "auto", per software codec, in preference order
+_HW_ENCODERS = {
+    "libx264": ("h264_videotoolbox", "h264_nvenc", "h264_qsv", "h264_v4l2m2m"),
+    "libx265": ("hevc_videotoolbox", "hevc_nvenc", "hevc_qsv", "hevc_v4l2m2m"),
+}
+
+# Rate-control args standing in for the x264 -preset, by encoder family
+_HW_QUALITY_ARGS = {
+    "videotoolbox": ["-q:v", "65"],
+    "nvenc": ["-cq", "23"],
+    "qsv": ["-global_quality", "23"],
+    # No quality-target mode; every frame is intra (-g 1), so give it room
+    "v4l2m2m": ["-b:v", "20M", "-maxrate", "20M"],
+}
+
+# hw_encoder setting + codec -> usable encoder name (None = software)
+_hw_encoder_cache: dict[tuple[str, str], str | None] = {}
+_hw_encoder_lock = threading.Lock()
+
+
+def find_tool(name: str) -> str | None:
+    """shutil.which(name), cached once found."""
+    path = _tool_paths.get(name)
+    if path is None:
+        path = shutil.which(name)
+        if path is not None:
+            _tool_paths[name] = path
+    return path
+
+
+def ffmpeg_bin() -> str:
+    """Return the ffmpeg path or raise RuntimeError."""
+    path = find_tool("ffmpeg")
+    if path is None:
+        raise RuntimeError("ffmpeg not found on PATH")
+    return path
+
+
+def video_codec_args(
+    codec: str, preset: str, hw_encoder: str = "",
+) -> tuple[list[str], list[str]]:
+    """(input args, output args) selecting the video encoder.
+
+    hw_encoder is "" for the software codec, "auto" to use the first hardware
+    encoder from _HW_ENCODERS that can actually encode on this machine, or an
+    explicit ffmpeg encoder name. Hardware encoders also decode with
+    -hwaccel auto and swap -preset for their own rate control.
+    """
+    encoder = resolve_hw_encoder(hw_encoder, codec)
+    if encoder is None:
+        return [], ["-c:v", codec, "-preset", preset]
+    family = encoder.rsplit("_", 1)[-1]
+    return ["-hwaccel", "auto"], ["-c:v", encoder, *_HW_QUALITY_ARGS.get(family, [])]
+
+
+def encoder_args(codec: str, preset: str, hw_encoder: str = "") -> list[str]:
+    """Output args of video_codec_args alone, decoding in software.
+
+    For encodes fed by a lavfi source or several inputs, where -hwaccel
+    would have to be repeated per input for no gain. Every intermediate that
+    is later stream-copied into the output must be encoded through this or
+    video_codec_args, so all share one encoder's parameter sets.
+    """
+    return video_codec_args(codec, preset, hw_encoder)[1]
+
+
+def resolve_hw_encoder(hw_encoder: str, codec: str) -> str | None:
+    """Hardware encoder to use for this setting, or None for software.
+
+    Candidates are checked once per process with a one-frame test encode —
+    -encoders lists encoders whose hardware or driver may be absent.
+    """
+    if not hw_encoder:
+        return None
+    key = (hw_encoder, codec)
+    with _hw_encoder_lock:
+        if key not in _hw_encoder_cache:
+            candidates = _HW_ENCODERS.get(codec, ()) if hw_encoder == "auto" else (hw_encoder,)
+            found = next((enc for enc in candidates if _can_encode(enc)), None)
+            if found is None:
+                print(f"  warning: no usable hardware encoder for {hw_encoder!r}, using {codec}")
+            _hw_encoder_cache[key] = found
+        return _hw_encoder_cache[key]
+
+
+def _can_encode(encoder: str) -> bool:
+    """True if ffmpeg can encode one small frame with encoder."""
+    cmd = [
+        ffmpeg_bin(),
+        "-f", "lavfi", "-i", "color=c=gray:s=256x256:d=0.1",
+        "-frames:v", "1", "-pix_fmt", "yuv420p",
+        "-c:v", encoder, "-f", "null", "-",
+    ]
+    try:
+        return run_ffmpeg(cmd, timeout=20).returncode == 0
+    except subprocess.TimeoutExpired:
+        return False
+
+
+def run_ffmpeg(
+    cmd: list[str],
+    timeout: float | None = None,
+    tail: int = STDERR_TAIL,
+    quiet: bool = True,
+) -> subprocess.CompletedProcess:
+    """Run an ffmpeg command, keeping only the last `tail` characters of stderr.
+
+    Drop-in for subprocess.run(cmd, capture_output=True, text=True, timeout=...)
+    on commands whose stdout is unused: stdout is discarded and stderr is drained
+    by a reader thread, so per-frame logging on long runs never accumulates in
+    memory. quiet=True inserts QUIET_ARGS after the binary so ffmpeg does not
+    emit that logging in the first place. Raises subprocess.TimeoutExpired
+    (after killing ffmpeg) on timeout.
+    """
+    argv = [cmd[0], *QUIET_ARGS, *cmd[1:]] if quiet else cmd
+    proc = subprocess.Popen(
+        argv,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    kept = ""
+
+    def _drain() -> None:
+        nonlocal kept
+        while True:
+            block = proc.stderr.read(_READ_SIZE)
+            if not block:
+                break
+            kept = (kept + block)[-tail:]
+
+    reader = threading.Thread(target=_drain, daemon=True)
+    reader.start()
+    try:
+        returncode = proc.wait(timeout=timeout)
+    except BaseException:  # timeout or interrupt: don't leave ffmpeg running
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        reader.join()
+        proc.stderr.close()
+
+    return subprocess.CompletedProcess(cmd, returncode, None, kept)
+
+
+def cached_output(
+    cache_dir: str | Path,
+    prefix: str,
+    key: str,
+    produce: Callable[[Path], None],
+    suffix: str = ".mp4",
+) -> Path:
+    """Return cache_dir/<prefix>_<hash(key)><suffix>, producing it on a miss.
+
+    produce(path) writes the file to a private temp name that is then
+    os.replace()d into place, so concurrent runs never see a partial file.
+    """
+    cache_dir = Path(cache_dir).expanduser().resolve()
+    digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    path = cache_dir / f"{prefix}_{digest}{suffix}"
+    if path.exists():
+        return path
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_dir / f".{path.stem}.{os.getpid()}.{threading.get_ident()}{suffix}"
+    try:
+        produce(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return path
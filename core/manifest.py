@@ -2,12 +2,22 @@
 
 import hashlib
 import json
-from dataclasses import dataclass, field, asdict
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 from .chunk import ChunkInfo
 
+# 2 = chunks / image_insertions / luma_flags stored as columns (name -> list)
+MANIFEST_VERSION = 2
+
+# Leaf size of "sha256-tree" checksums — fixed, so the value never depends on
+# how many threads hashed the file
+_TREE_LEAF_SIZE = 64 << 20
+
 
 @dataclass
 class ImageEntry:
@@ -21,62 +31,145 @@ class LumaFlag:
     position: int       # index in final sequence
     delta: float
     threshold: float
+    output_frame: int = 0   # first output frame after the cut
+
+
+_CHUNK_COLUMNS = tuple(f.name for f in fields(ChunkInfo))
+_IMAGE_COLUMNS = tuple(f.name for f in fields(ImageEntry))
+_LUMA_COLUMNS = tuple(f.name for f in fields(LumaFlag))
+
+
+def _columns(names: tuple[str, ...], rows: list[dict] = ()) -> dict[str, list]:
+    """Column lists for names, filled from row dicts (version 1 layout) if given."""
+    return {n: [row.get(n) for row in rows] for n in names}
 
 
 @dataclass
 class Manifest:
     rng_seed: int
     config_snapshot: dict
-    chunks: list[dict] = field(default_factory=list)
-    image_insertions: list[dict] = field(default_factory=list)
-    luma_flags: list[dict] = field(default_factory=list)
+    manifest_version: int = MANIFEST_VERSION
+    # Per-record data is columnar: one list per field, not one dict per record
+    chunks: dict[str, list] = field(default_factory=lambda: _columns(_CHUNK_COLUMNS))
+    image_insertions: dict[str, list] = field(default_factory=lambda: _columns(_IMAGE_COLUMNS))
+    luma_flags: dict[str, list] = field(default_factory=lambda: _columns(_LUMA_COLUMNS))
     sequence_order: list[str] = field(default_factory=list)  # ordered paths
+    shuffled_order: list[int] = field(default_factory=list)  # indices into chunks, post-shuffle
+    position_to_output_frame: list[int] = field(default_factory=list)  # running frame total per position
     expected_frame_count: int = 0
     actual_frame_count: int = 0
     output_checksum: str = ""
     output_path: str = ""
+    stage_timings: dict = field(default_factory=dict)  # stage -> [frames, seconds]
 
     def add_chunk(self, chunk: ChunkInfo) -> None:
-        self.chunks.append({
-            "source_file": chunk.source_file,
-            "start_frame": chunk.start_frame,
-            "frame_count": chunk.frame_count,
-            "chunk_path": chunk.chunk_path,
-            "chunk_index": chunk.chunk_index,
-        })
+        for name, column in self.chunks.items():
+            column.append(getattr(chunk, name))
 
     def add_image(self, entry: ImageEntry) -> None:
-        self.image_insertions.append(asdict(entry))
+        for name, column in self.image_insertions.items():
+            column.append(getattr(entry, name))
 
     def add_luma_flag(self, flag: LumaFlag) -> None:
-        self.luma_flags.append(asdict(flag))
+        for name, column in self.luma_flags.items():
+            column.append(getattr(flag, name))
+
+    @property
+    def luma_flag_count(self) -> int:
+        return len(self.luma_flags["position"])
+
+    def chunks_iter(self) -> Iterator[ChunkInfo]:
+        """Recorded chunks as ChunkInfo, in insertion order — the record view of the columns."""
+        return (ChunkInfo(*row) for row in zip(*(self.chunks[n] for n in _CHUNK_COLUMNS)))
 
-    def set_output(self, path: str | Path, frame_count: int) -> None:
+    def rows(self, name: str) -> list[dict]:
+        """One dict per record of a columnar field ("chunks", "image_insertions", "luma_flags")."""
+        columns = getattr(self, name)
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    def add_stage_timing(self, stage: str, frames: int, seconds: float) -> None:
+        """Accumulate frames processed and wall time for an assembly stage."""
+        prev_frames, prev_seconds = self.stage_timings.get(stage, (0, 0.0))
+        self.stage_timings[stage] = [prev_frames + frames, round(prev_seconds + seconds, 3)]
+
+    def set_output(self, path: str | Path, frame_count: int, algorithm: str = "sha256") -> None:
         self.output_path = str(path)
         self.actual_frame_count = frame_count
-        self.output_checksum = _checksum_file(path)
+        self.output_checksum = _checksum_file(path, algorithm)
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        # Record fields are stored as columns (name -> list); reference them, don't copy
+        return {f.name: getattr(self, f.name) for f in fields(self)}
 
-    def save(self, path: str | Path) -> Path:
+    def save(self, path: str | Path, indent: int | None = 2) -> Path:
+        """Write the manifest as JSON — indented, so it stays human-readable and
+        diffable; indent=None writes it compact."""
         path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w") as f:
-            json.dump(self.to_dict(), f, indent=2)
+        if indent is None:
+            body = json.dumps(self.to_dict(), separators=(",", ":"))
+        else:
+            body = json.dumps(self.to_dict(), indent=indent)
+        path.write_text(body)
         return path
 
     @classmethod
     def load(cls, path: str | Path) -> "Manifest":
+        """Load a manifest; version 1 files (one dict per record) are converted to columns."""
         with open(path) as f:
             data = json.load(f)
+        if data.get("manifest_version", 1) < 2:
+            for name, columns in (
+                ("chunks", _CHUNK_COLUMNS),
+                ("image_insertions", _IMAGE_COLUMNS),
+                ("luma_flags", _LUMA_COLUMNS),
+            ):
+                data[name] = _columns(columns, data.get(name, []))
+            data["manifest_version"] = MANIFEST_VERSION
         return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
 
 
 def _checksum_file(path: str | Path, algorithm: str = "sha256") -> str:
-    """Compute file checksum."""
-    h = hashlib.new(algorithm)
+    """Compute file checksum.
+
+    hashlib.file_digest (3.11+) hashes in C without the GIL; older Pythons
+    fall back to a 1 MiB block loop. "sha256-tree" hashes 64 MiB leaves in
+    parallel instead; see _tree_checksum.
+    """
+    if algorithm == "sha256-tree":
+        return _tree_checksum(path)
     with open(path, "rb") as f:
-        for block in iter(lambda: f.read(8192), b""):
-            h.update(block)
+        if hasattr(hashlib, "file_digest"):
+            h = hashlib.file_digest(f, algorithm)
+        else:
+            h = hashlib.new(algorithm)
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
     return f"{algorithm}:{h.hexdigest()}"
+
+
+def _tree_checksum(path: str | Path, workers: int | None = None) -> str:
+    """sha256 over the concatenated sha256 digests of each _TREE_LEAF_SIZE leaf.
+
+    Leaves are hashed on a thread pool straight from an mmap — hashlib drops
+    the GIL for large buffers — so multi-GB outputs hash at several times
+    single-stream speed. Not comparable with a plain sha256sum of the file.
+    """
+    size = os.path.getsize(path)
+    root = hashlib.sha256()
+    if size == 0:
+        return f"sha256-tree:{root.hexdigest()}"
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+
+        def _leaf(start: int) -> bytes:
+            return hashlib.sha256(view[start:start + _TREE_LEAF_SIZE]).digest()
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 2) as pool:
+                for digest in pool.map(_leaf, range(0, size, _TREE_LEAF_SIZE)):
+                    root.update(digest)
+        finally:
+            view.release()
+    return f"sha256-tree:{root.hexdigest()}"
@@ -1,12 +1,15 @@
 """Input normalization — conform all sources to uniform resolution, fps, pix_fmt, colorspace."""
 
-import shutil
+import functools
 import subprocess
 import tempfile
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterator
 
 from .config import SplicerConfig
-from .probe import ProbeResult, probe
+from .ffmpeg import ffmpeg_bin, run_ffmpeg, video_codec_args
+from .probe import ProbeError, ProbeResult, probe
 
 
 def normalize_video(
@@ -20,7 +23,7 @@ def normalize_video(
     output_path = Path(output_path)
 
     if probe_result is None:
-        probe_result = probe(input_path)
+        probe_result = probe(input_path, config.probe_timeout)
 
     if probe_result.is_vfr:
         print(f"  warning: {input_path.name} is variable frame rate, forcing CFR")
@@ -33,10 +36,45 @@ def normalize_video(
         output_path=output_path,
     )
 
-    _run_ffmpeg(cmd, f"normalizing {input_path.name}")
+    _run_ffmpeg(cmd, f"normalizing {input_path.name}", config.ffmpeg_timeout or 600)
     return output_path
 
 
+def normalize_batch(
+    input_paths: list[Path],
+    output_dir: str | Path,
+    config: SplicerConfig,
+    pool: Executor | None = None,
+) -> Iterator[tuple[int, Path | None, ProbeResult | str]]:
+    """Probe and normalize videos concurrently, yielding results as each finishes.
+
+    Yields (index, output_path, probe_result), or (index, None, error message)
+    for a video that failed. Output files are norm_<index>.mp4 in output_dir.
+    Each encode is its own ffmpeg process, so a thread per job suffices; the
+    encodes' -threads are split across config.max_workers (see
+    SplicerConfig.encoder_threads) so they don't oversubscribe the cores.
+    """
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=config.max_workers) as own_pool:
+            yield from normalize_batch(input_paths, output_dir, config, own_pool)
+        return
+
+    output_dir = Path(output_dir)
+
+    def _one(idx: int, path: Path) -> tuple[int, Path | None, ProbeResult | str]:
+        try:
+            info = probe(path, config.probe_timeout)
+            out = output_dir / f"norm_{idx:04d}.mp4"
+            normalize_video(path, out, config, probe_result=info)
+            return idx, out, info
+        except (ProbeError, RuntimeError) as e:
+            return idx, None, str(e)
+
+    futures = [pool.submit(_one, i, p) for i, p in enumerate(input_paths)]
+    for future in as_completed(futures):
+        yield future.result()
+
+
 def normalize_image(
     input_path: str | Path,
     output_path: str | Path,
@@ -61,27 +99,34 @@ def normalize_image(
         extra_output_args=["-t", str(duration_sec)],
     )
 
-    _run_ffmpeg(cmd, f"normalizing image {input_path.name}")
+    _run_ffmpeg(cmd, f"normalizing image {input_path.name}", config.ffmpeg_timeout or 600)
     return output_path
 
 
 def _build_video_filter(config: SplicerConfig) -> str:
     """Build the -vf filter string for normalization."""
-    w, h = config.width, config.height
+    return _video_filter(
+        config.width, config.height, config.aspect_mode,
+        config.target_fps, config.target_pix_fmt,
+    )
+
 
-    if config.aspect_mode == "letterbox":
+@functools.lru_cache(maxsize=32)
+def _video_filter(w: int, h: int, aspect_mode: str, fps: int, pix_fmt: str) -> str:
+    """Filter string for one set of target specs — built once, then cached."""
+    if aspect_mode == "letterbox":
         scale = f"scale={w}:{h}:force_original_aspect_ratio=decrease"
         pad = f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2"
         vf_parts = [scale, pad]
-    elif config.aspect_mode == "crop":
+    elif aspect_mode == "crop":
         scale = f"scale={w}:{h}:force_original_aspect_ratio=increase"
         crop = f"crop={w}:{h}"
         vf_parts = [scale, crop]
     else:  # stretch
         vf_parts = [f"scale={w}:{h}"]
 
-    vf_parts.append(f"fps={config.target_fps}")
-    vf_parts.append(f"format={config.target_pix_fmt}")
+    vf_parts.append(f"fps={fps}")
+    vf_parts.append(f"format={pix_fmt}")
 
     return ",".join(vf_parts)
 
@@ -94,19 +139,19 @@ def _build_encode_cmd(
     extra_output_args: list[str] | None = None,
 ) -> list[str]:
     """Build a full ffmpeg encode command."""
-    ffmpeg = shutil.which("ffmpeg")
-    if ffmpeg is None:
-        raise RuntimeError("ffmpeg not found on PATH")
+    ffmpeg = ffmpeg_bin()
+
+    hw_input_args, codec_args = video_codec_args(config.codec, config.preset, config.hw_encoder)
 
-    cmd = [ffmpeg, "-y"]
+    cmd = [ffmpeg, "-y", *hw_input_args, "-thread_queue_size", str(config.ffmpeg_thread_queue_size)]
     cmd.extend(input_args)
     cmd.extend(["-vf", vf])
     cmd.extend([
+        "-threads", str(config.encoder_threads(config.max_workers)),
         "-colorspace", config.target_colorspace,
         "-color_primaries", config.color_primaries,
         "-color_trc", config.color_trc,
-        "-c:v", config.codec,
-        "-preset", config.preset,
+        *codec_args,
         "-g", "1",
         "-bf", "0",
         "-an",
@@ -118,9 +163,11 @@ def _build_encode_cmd(
     return cmd
 
 
-def _run_ffmpeg(cmd: list[str], description: str = "") -> subprocess.CompletedProcess:
+def _run_ffmpeg(
+    cmd: list[str], description: str = "", timeout: float = 600,
+) -> subprocess.CompletedProcess:
     """Run an ffmpeg command, raising on failure."""
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+    result = run_ffmpeg(cmd, timeout=timeout)
     if result.returncode != 0:
         raise RuntimeError(
             f"ffmpeg failed ({description}):\n"
@@ -1,12 +1,20 @@
 """Platform validation — verify tools and report environment at startup."""
 
+import json
+import os
 import platform
-import shutil
 import subprocess
 import sys
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Optional
 
+from .ffmpeg import find_tool
+
+# Tool versions keyed by "path|mtime_ns|size" — a binary's version only
+# changes when the file does, so -version runs once per install, not per run
+_version_cache: dict[str, str] | None = None
+
 
 @dataclass
 class PlatformInfo:
@@ -32,18 +40,18 @@ def platform_check(verbose: bool = True) -> PlatformInfo:
     os_version = platform.release()
     python_version = platform.python_version()
 
-    ffmpeg_path = shutil.which("ffmpeg")
+    ffmpeg_path = find_tool("ffmpeg")
     if ffmpeg_path is None:
         hint = _install_hint(os_name, "ffmpeg")
         raise PlatformError(f"ffmpeg not found on PATH. {hint}")
 
-    ffprobe_path = shutil.which("ffprobe")
+    ffprobe_path = find_tool("ffprobe")
     if ffprobe_path is None:
         hint = _install_hint(os_name, "ffprobe")
         raise PlatformError(f"ffprobe not found on PATH. {hint}")
 
-    ffmpeg_version = _get_tool_version(ffmpeg_path)
-    ffprobe_version = _get_tool_version(ffprobe_path)
+    ffmpeg_version = _cached_tool_version(ffmpeg_path)
+    ffprobe_version = _cached_tool_version(ffprobe_path)
 
     info = PlatformInfo(
         os_name=os_name,
@@ -63,6 +71,68 @@ def platform_check(verbose: bool = True) -> PlatformInfo:
     return info
 
 
+def user_cache_dir() -> Path | None:
+    """Per-user cache directory for splicer, resolved when first needed.
+
+    %LOCALAPPDATA% on Windows, else $XDG_CACHE_HOME or ~/.cache; None when
+    no home directory can be determined.
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        try:
+            home = Path.home()
+        except RuntimeError:
+            return None
+        base = home / "AppData" / "Local" if sys.platform == "win32" else home / ".cache"
+    return Path(base) / "splicer"
+
+
+def _version_cache_path() -> Path | None:
+    """Per-user cache file for tool versions; None without a user cache dir."""
+    cache_dir = user_cache_dir()
+    return cache_dir / "tool_versions.json" if cache_dir is not None else None
+
+
+def _cached_tool_version(tool_path: str) -> str:
+    """_get_tool_version, remembered on disk per binary identity."""
+    global _version_cache
+
+    cache_path = _version_cache_path()
+    if cache_path is None:
+        return _get_tool_version(tool_path)
+    try:
+        st = os.stat(tool_path)
+    except OSError:
+        return _get_tool_version(tool_path)
+    key = f"{tool_path}|{st.st_mtime_ns}|{st.st_size}"
+
+    if _version_cache is None:
+        try:
+            with open(cache_path) as f:
+                _version_cache = dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            _version_cache = {}
+
+    version = _version_cache.get(key)
+    if version is not None:
+        return version
+
+    version = _get_tool_version(tool_path)
+    if version and version != "unknown":
+        _version_cache[key] = version
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(_version_cache))
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass  # cache is best-effort
+    return version
+
+
 def _get_tool_version(tool_path: str) -> str:
     """Extract version string from ffmpeg/ffprobe -version output."""
     try:
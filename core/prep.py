@@ -1,10 +1,14 @@
 """Preprocessing — coarse-cut and transform raw source material before the splicer pipeline."""
 
+import ctypes
+import os
 import shutil
 import subprocess
+import sys
 from pathlib import Path
 
 from .config import SplicerConfig
+from .ffmpeg import ffmpeg_bin, run_ffmpeg, video_codec_args
 from .probe import probe, ProbeError
 
 
@@ -22,7 +26,7 @@ def grain_video(input_path: Path, output_dir: Path, config: SplicerConfig) -> li
     output_dir = Path(output_dir)
 
     try:
-        info = probe(input_path)
+        info = probe(input_path, config.probe_timeout)
     except ProbeError as e:
         print(f"    SKIPPED (probe failed): {e}")
         return []
@@ -35,7 +39,7 @@ def grain_video(input_path: Path, output_dir: Path, config: SplicerConfig) -> li
 
     print(f"    {input_path.name}: {info.duration:.1f}s — splitting into ~{config.grain_duration}s segments")
 
-    ffmpeg = _get_ffmpeg()
+    ffmpeg = ffmpeg_bin()
     pattern = str(output_dir / f"{input_path.stem}_grain_%03d.mp4")
 
     cmd = [
@@ -49,10 +53,10 @@ def grain_video(input_path: Path, output_dir: Path, config: SplicerConfig) -> li
         pattern,
     ]
 
-    _run_ffmpeg(cmd, f"graining {input_path.name}")
+    _run_ffmpeg(cmd, f"graining {input_path.name}", config.ffmpeg_timeout or 600)
 
     # Collect output files (segment muxer creates _000, _001, etc.)
-    segments = sorted(output_dir.glob(f"{input_path.stem}_grain_*.mp4"))
+    segments = _segment_outputs(output_dir, f"{input_path.stem}_grain_", ".mp4")
     print(f"    -> {len(segments)} segments")
     return segments
 
@@ -68,21 +72,68 @@ def greyscale_video(input_path: Path, output_dir: Path, config: SplicerConfig) -
     output_path = output_dir / f"{input_path.stem}_grey.mp4"
     print(f"    {input_path.name} -> {output_path.name}")
 
-    ffmpeg = _get_ffmpeg()
-    cmd = [
-        ffmpeg, "-y",
+    cmd = _greyscale_cmd(input_path, config, [str(output_path)])
+    _run_ffmpeg(cmd, f"greyscale {input_path.name}", config.ffmpeg_timeout or 600)
+    return output_path
+
+
+def grain_and_greyscale(input_path: Path, output_dir: Path, config: SplicerConfig) -> list[Path]:
+    """grain_video then greyscale_video, fused into one ffmpeg pass.
+
+    The greyscale re-encode feeds the segment muxer directly, so the source is
+    decoded once and no full-colour grain segments are written. Output names
+    match the two-step result ({stem}_grain_NNN_grey.mp4).
+    """
+    input_path = Path(input_path)
+    output_dir = Path(output_dir)
+
+    try:
+        info = probe(input_path, config.probe_timeout)
+    except ProbeError as e:
+        print(f"    SKIPPED (probe failed): {e}")
+        return []
+
+    if info.duration <= config.grain_duration:
+        dest = output_dir / f"{input_path.stem}_grain_000_grey.mp4"
+        print(f"    {input_path.name}: {info.duration:.1f}s — already under {config.grain_duration}s -> {dest.name}")
+        _run_ffmpeg(
+            _greyscale_cmd(input_path, config, [str(dest)]), f"greyscale {input_path.name}",
+            config.ffmpeg_timeout or 600,
+        )
+        return [dest]
+
+    print(f"    {input_path.name}: {info.duration:.1f}s — greyscale, splitting into ~{config.grain_duration}s segments")
+
+    pattern = str(output_dir / f"{input_path.stem}_grain_%03d_grey.mp4")
+    cmd = _greyscale_cmd(input_path, config, [
+        # Re-encoding, so place keyframes where the segment cuts should fall
+        "-force_key_frames", f"expr:gte(t,n_forced*{config.grain_duration})",
+        "-f", "segment",
+        "-segment_time", str(config.grain_duration),
+        "-reset_timestamps", "1",
+        pattern,
+    ])
+    _run_ffmpeg(cmd, f"grain+greyscale {input_path.name}", config.ffmpeg_timeout or 600)
+
+    segments = _segment_outputs(output_dir, f"{input_path.stem}_grain_", "_grey.mp4")
+    print(f"    -> {len(segments)} segments")
+    return segments
+
+
+def _greyscale_cmd(input_path: Path, config: SplicerConfig, output_args: list[str]) -> list[str]:
+    """hue=s=0 re-encode of input_path; output_args end with the output target."""
+    hw_input_args, codec_args = video_codec_args(config.codec, config.preset, config.hw_encoder)
+    return [
+        ffmpeg_bin(), "-y",
+        *hw_input_args,
         "-i", str(input_path),
         "-vf", "hue=s=0",
-        "-c:v", config.codec,
-        "-preset", config.preset,
+        *codec_args,
         "-pix_fmt", "yuv420p",
         "-an",
-        str(output_path),
+        *output_args,
     ]
 
-    _run_ffmpeg(cmd, f"greyscale {input_path.name}")
-    return output_path
-
 
 def collect_videos(paths: list[str]) -> list[Path]:
     """Expand directories and filter to supported video types."""
@@ -90,9 +141,15 @@ def collect_videos(paths: list[str]) -> list[Path]:
     for p_str in paths:
         p = Path(p_str)
         if p.is_dir():
-            for child in sorted(p.iterdir()):
-                if child.is_file() and child.suffix.lower() in VIDEO_EXTENSIONS:
-                    result.append(child)
+            # DirEntry caches is_file() from readdir — no extra stat per entry
+            with os.scandir(p) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            for e in entries:
+                if not e.is_file():
+                    continue
+                dot = e.name.rfind(".")
+                if dot >= 0 and e.name[dot:].lower() in VIDEO_EXTENSIONS:
+                    result.append(Path(e.path))
         elif p.is_file() and p.suffix.lower() in VIDEO_EXTENSIONS:
             result.append(p)
         else:
@@ -100,19 +157,54 @@ def collect_videos(paths: list[str]) -> list[Path]:
     return result
 
 
-def _get_ffmpeg() -> str:
-    ffmpeg = shutil.which("ffmpeg")
-    if ffmpeg is None:
-        raise RuntimeError("ffmpeg not found on PATH")
-    return ffmpeg
+def _segment_outputs(output_dir: Path, prefix: str, suffix: str) -> list[Path]:
+    """Segment-muxer outputs prefix000suffix, prefix001suffix, ... up to the first gap.
+
+    One stat per segment instead of listing (and pattern-matching) the whole
+    output directory, which grows with every video prepped into it.
+    """
+    segments: list[Path] = []
+    while True:
+        path = output_dir / f"{prefix}{len(segments):03d}{suffix}"
+        if not path.is_file():
+            return segments
+        segments.append(path)
 
 
 def _copy_file(src: Path, dst: Path) -> None:
+    """Copy src to dst with its metadata, without a userspace read/write loop where possible.
+
+    macOS clonefile(2) is O(1) on APFS; Linux copy_file_range(2) copies inside
+    the kernel and reflinks on btrfs/xfs. Any failure falls back to shutil.copy2.
+    """
+    try:
+        if sys.platform == "darwin":
+            dst.unlink(missing_ok=True)  # clonefile refuses an existing target
+            if _clonefile(src, dst):
+                return
+        elif hasattr(os, "copy_file_range"):
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                    pass
+            shutil.copystat(src, dst)
+            return
+    except OSError:
+        pass
     shutil.copy2(src, dst)
 
 
-def _run_ffmpeg(cmd: list[str], description: str = "") -> subprocess.CompletedProcess:
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+def _clonefile(src: Path, dst: Path) -> bool:
+    """clonefile(2) via libc; False if unavailable or the filesystem can't clone."""
+    clonefile = getattr(ctypes.CDLL(None, use_errno=True), "clonefile", None)
+    if clonefile is None:
+        return False
+    return clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+
+
+def _run_ffmpeg(
+    cmd: list[str], description: str = "", timeout: float = 600,
+) -> subprocess.CompletedProcess:
+    result = run_ffmpeg(cmd, timeout=timeout)
     if result.returncode != 0:
         raise RuntimeError(
             f"ffmpeg failed ({description}):\n"
@@ -1,12 +1,50 @@
 """ffprobe wrapper — structured input validation and metadata extraction."""
 
+import functools
 import json
-import shutil
+import os
+import re
+import struct
 import subprocess
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
 from fractions import Fraction
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, TypeVar
+
+from .ffmpeg import QUIET_ARGS, find_tool
+
+_YAVG_KEY = "lavfi.signalstats.YAVG"
+_YAVG_RE = re.compile(rb"lavfi\.signalstats\.YAVG=([-\d.]+)")
+
+# Still-image detection: ffprobe container formats and codec names
+_IMAGE_FORMATS = frozenset({"image2", "png_pipe", "jpeg_pipe", "webp_pipe", "bmp_pipe",
+                            "tiff_pipe", "svg_pipe"})
+_IMAGE_CODECS = frozenset({"png", "mjpeg", "jpeg2000", "webp", "bmp", "tiff"})
+
+# Still images whose dimensions are read from the file header, skipping ffprobe
+_HEADER_IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+# JPEG start-of-frame markers (SOF0-SOF15 minus DHT, JPG and DAC)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+_V = TypeVar("_V")
+
+# Per-process results keyed by (resolved path, mtime_ns, size), so a file that
+# is rewritten in place is probed again
+_probe_cache: dict[tuple[str, int, int], "ProbeResult"] = {}
+_luma_cache: dict[tuple[str, int, int], float] = {}
+
+# Per-key locks so concurrent callers asking for the same file wait for one
+# ffprobe/ffmpeg run instead of each spawning their own
+_key_locks: dict[tuple, threading.Lock] = {}
+_key_locks_guard = threading.Lock()
+
+PROBE_TIMEOUT = 30  # seconds per ffprobe run
+
+PROBE_CACHE_FILENAME = "probe_cache.json"
+_PROBE_CACHE_VERSION = 1
+_PROBE_CACHE_MAX_ENTRIES = 10_000
 
 
 @dataclass
@@ -42,62 +80,256 @@ class ProbeError(Exception):
 
 def ensure_ffprobe() -> str:
     """Return ffprobe path or raise."""
-    path = shutil.which("ffprobe")
+    path = find_tool("ffprobe")
     if path is None:
         raise ProbeError("ffprobe not found on PATH. Install via: brew install ffmpeg")
     return path
 
 
-def probe(filepath: str | Path) -> ProbeResult:
-    """Run ffprobe on a file and return structured metadata."""
+def _cache_key(filepath: Path) -> tuple[str, int, int]:
+    try:
+        st = filepath.stat()
+    except OSError:
+        raise ProbeError(f"File not found: {filepath}") from None
+    return (str(filepath.resolve()), st.st_mtime_ns, st.st_size)
+
+
+def _cached_once(cache: dict, key: tuple, compute: Callable[[], _V]) -> _V:
+    """cache[key], computing it at most once even under concurrent callers."""
+    value = cache.get(key)
+    if value is not None:
+        return value
+    lock_key = (id(cache), *key)
+    with _key_locks_guard:
+        lock = _key_locks.setdefault(lock_key, threading.Lock())
+    try:
+        with lock:
+            value = cache.get(key)
+            if value is None:
+                value = cache[key] = compute()
+            return value
+    finally:
+        with _key_locks_guard:
+            _key_locks.pop(lock_key, None)
+
+
+def probe(filepath: str | Path, timeout: float = PROBE_TIMEOUT) -> ProbeResult:
+    """Run ffprobe on a file and return structured metadata.
+
+    Results are cached per process; an unchanged file is only probed once.
+    """
     filepath = Path(filepath)
-    if not filepath.exists():
-        raise ProbeError(f"File not found: {filepath}")
+    key = _cache_key(filepath)
+    cached = _cached_once(
+        _probe_cache, key,
+        lambda: _probe_image_header(filepath) or _run_ffprobe(filepath, timeout),
+    )
+    if cached.path != str(filepath):
+        return replace(cached, path=str(filepath))
+    return cached
+
+
+class ProbeCache:
+    """probe() results persisted to a JSON file, least-recently-used capped.
+
+    Entries are keyed by resolved path and validated against mtime_ns and
+    size, so a dry run warms the probes of the real run and repeat runs over
+    the same sources skip ffprobe. Call save() to write changes back.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = _PROBE_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        # resolved path -> [mtime_ns, size, ProbeResult fields]; oldest first
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") == _PROBE_CACHE_VERSION:
+                self._entries.update(data.get("entries", {}))
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def probe(self, filepath: str | Path, timeout: float = PROBE_TIMEOUT) -> ProbeResult:
+        """probe(filepath), served from the file when the entry is current."""
+        filepath = Path(filepath)
+        key = _cache_key(filepath)
+        resolved, mtime_ns, size = key
+        with self._lock:
+            entry = self._entries.get(resolved)
+            if entry is not None and entry[0] == mtime_ns and entry[1] == size:
+                # Recency is persisted, so a hit rewrites the file on save()
+                self._entries.move_to_end(resolved)
+                self._dirty = True
+            else:
+                entry = None
+        if entry is not None:
+            try:
+                result = ProbeResult(**entry[2])
+            except TypeError:
+                pass  # stale field set; fall through to a fresh probe
+            else:
+                _probe_cache.setdefault(key, result)
+                return replace(result, path=str(filepath))
+
+        result = probe(filepath, timeout)
+        with self._lock:
+            self._entries[resolved] = [mtime_ns, size, asdict(result)]
+            self._entries.move_to_end(resolved)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+        return result
+
+    def save(self) -> None:
+        """Write the cache file atomically if any entry was used or changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            body = json.dumps(
+                {"version": _PROBE_CACHE_VERSION, "entries": self._entries},
+                separators=(",", ":"),
+            )
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(body)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            tmp.unlink(missing_ok=True)
+            print(f"  warning: could not save probe cache {self.path}: {e}")
+
+
+def _probe_image_header(filepath: Path) -> Optional[ProbeResult]:
+    """ProbeResult for a PNG, JPEG, BMP or WebP still, read from its header.
+
+    Returns None for any other file, or a header this can't parse, so the
+    caller falls back to ffprobe.
+    """
+    if not filepath.name.lower().endswith(_HEADER_IMAGE_SUFFIXES):
+        return None
+    try:
+        with open(filepath, "rb") as f:
+            found = _read_image_size(f)
+    except (OSError, struct.error):
+        return None
+    if found is None:
+        return None
+    codec_name, format_name, width, height = found
+    return ProbeResult(
+        path=str(filepath),
+        codec_name=codec_name,
+        width=width,
+        height=height,
+        pix_fmt="unknown",
+        fps=0.0,
+        duration=0.0,
+        frame_count=1,
+        colorspace="unknown",
+        color_primaries="unknown",
+        color_trc="unknown",
+        is_image=True,
+        is_vfr=False,
+        rotation=0,
+        format_name=format_name,
+    )
+
+
+def _read_image_size(f) -> Optional[tuple[str, str, int, int]]:
+    """(codec_name, format_name, width, height) from an image header, or None."""
+    head = f.read(30)
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", head[16:24])
+        return "png", "png_pipe", width, height
+    if head[:2] == b"BM" and len(head) >= 26:
+        width, height = struct.unpack("<ii", head[18:26])
+        return "bmp", "bmp_pipe", width, abs(height)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        chunk = head[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", head[26:30])
+            return "webp", "webp_pipe", width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(head[21:25], "little")
+            return "webp", "webp_pipe", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            width = int.from_bytes(head[24:27], "little") + 1
+            height = int.from_bytes(head[27:30], "little") + 1
+            return "webp", "webp_pipe", width, height
+        return None
+    if head[:2] == b"\xff\xd8":
+        # Walk marker segments to the start-of-frame, seeking past the rest
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            if marker[1] == 0xFF:  # fill byte
+                f.seek(-1, os.SEEK_CUR)
+                continue
+            length = struct.unpack(">H", f.read(2))[0]
+            if length < 2:
+                return None
+            if marker[1] in _JPEG_SOF_MARKERS:
+                height, width = struct.unpack(">xHH", f.read(5))
+                return "mjpeg", "image2", width, height
+            f.seek(length - 2, os.SEEK_CUR)
+    return None
+
 
+def _run_ffprobe(filepath: Path, timeout: float = PROBE_TIMEOUT) -> ProbeResult:
     ffprobe = ensure_ffprobe()
+    # Ask only for what ProbeResult uses: the first video stream, and the two
+    # format fields — not every audio/subtitle/data stream and container tag
     cmd = [
         ffprobe,
         "-v", "quiet",
         "-print_format", "json",
+        "-select_streams", "v:0",
         "-show_streams",
-        "-show_format",
+        "-show_entries", "format=format_name,duration",
         str(filepath),
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    # -v quiet leaves stderr empty; stdout stays bytes, which json.loads reads
+    # directly without a separate text-decoding pass
+    try:
+        result = subprocess.run(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise ProbeError(f"ffprobe timed out after {timeout}s on {filepath}") from None
     if result.returncode != 0:
-        raise ProbeError(f"ffprobe failed on {filepath}: {result.stderr}")
+        raise ProbeError(f"ffprobe failed on {filepath} (exit code {result.returncode})")
 
     data = json.loads(result.stdout)
 
-    # Find the video stream
-    video_stream = None
-    for s in data.get("streams", []):
-        if s.get("codec_type") == "video":
-            video_stream = s
-            break
-
-    if video_stream is None:
+    # -select_streams v:0 leaves at most one stream, and it is the video one
+    streams = data.get("streams")
+    if not streams:
         raise ProbeError(f"No video stream found in {filepath}")
+    video_stream = streams[0]
+    codec_name = video_stream.get("codec_name", "")
 
     fmt = data.get("format", {})
     format_name = fmt.get("format_name", "")
 
-    # Detect if this is a still image
-    image_formats = {"image2", "png_pipe", "jpeg_pipe", "webp_pipe", "bmp_pipe",
-                     "tiff_pipe", "svg_pipe"}
-    image_codecs = {"png", "mjpeg", "jpeg2000", "webp", "bmp", "tiff"}
+    # Detect if this is a still image — codec lookup first, it's the cheaper test
     is_image = (
-        bool(set(format_name.split(",")) & image_formats)
-        or video_stream.get("codec_name", "") in image_codecs
+        codec_name in _IMAGE_CODECS
+        or any(f in _IMAGE_FORMATS for f in format_name.split(","))
     )
 
-    # FPS parsing
-    fps = _parse_fps(video_stream)
-
-    # VFR detection: avg_frame_rate != r_frame_rate
+    # FPS parsing — each rate string parsed once, fps prefers r_frame_rate
     avg_fps = _parse_rate(video_stream.get("avg_frame_rate", "0/1"))
     r_fps = _parse_rate(video_stream.get("r_frame_rate", "0/1"))
-    is_vfr = abs(avg_fps - r_fps) > 0.5 if (avg_fps > 0 and r_fps > 0) else False
+    fps = r_fps or avg_fps or 24.0
+
+    # VFR detection: avg_frame_rate != r_frame_rate
+    is_vfr = avg_fps > 0 and r_fps > 0 and abs(avg_fps - r_fps) > 0.5
 
     # Duration
     duration = float(video_stream.get("duration", fmt.get("duration", 0)))
@@ -116,7 +348,7 @@ def probe(filepath: str | Path) -> ProbeResult:
 
     return ProbeResult(
         path=str(filepath),
-        codec_name=video_stream.get("codec_name", "unknown"),
+        codec_name=codec_name or "unknown",
         width=width,
         height=height,
         pix_fmt=video_stream.get("pix_fmt", "unknown"),
@@ -133,44 +365,104 @@ def probe(filepath: str | Path) -> ProbeResult:
     )
 
 
-def probe_mean_luma(filepath: str | Path) -> float:
-    """Compute mean luma (0-255) of an entire file using ffmpeg signalstats."""
-    ffmpeg = shutil.which("ffmpeg")
+def probe_mean_luma(filepath: str | Path, timeout: float = 120) -> float:
+    """Compute mean luma (0-255) of an entire file using ffmpeg signalstats.
+
+    Cached per process like probe().
+    """
+    key = _cache_key(Path(filepath))
+    return _cached_once(_luma_cache, key, lambda: _run_mean_luma(filepath, timeout))
+
+
+def _run_mean_luma(filepath: str | Path, timeout: float = 120) -> float:
+    ffmpeg = find_tool("ffmpeg")
     if ffmpeg is None:
         raise ProbeError("ffmpeg not found on PATH")
 
+    # Only the YAVG key goes to stdout, one short line per frame; with the log
+    # quietened and audio skipped, stderr carries nothing worth reading
     cmd = [
-        ffmpeg,
+        ffmpeg, *QUIET_ARGS,
         "-i", str(filepath),
-        "-vf", "signalstats,metadata=print:key=lavfi.signalstats.YAVG",
+        "-map", "0:v:0", "-an",
+        "-vf", f"signalstats,metadata=mode=print:key={_YAVG_KEY}:file=-",
         "-f", "null", "-",
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-
-    # Parse YAVG values from stderr
-    values = []
-    for line in result.stderr.splitlines():
-        if "lavfi.signalstats.YAVG" in line:
-            try:
-                val = float(line.split("=")[-1].strip())
-                values.append(val)
-            except ValueError:
-                continue
+    try:
+        result = subprocess.run(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise ProbeError(f"signalstats timed out after {timeout}s on {filepath}") from None
+
+    # One regex scan over the raw stdout bytes — no decode, no line split
+    total = 0.0
+    count = 0
+    for m in _YAVG_RE.finditer(result.stdout):
+        try:
+            total += float(m.group(1))
+        except ValueError:
+            continue
+        count += 1
 
-    if not values:
+    if not count:
         raise ProbeError(f"Could not compute luma for {filepath}")
 
-    return sum(values) / len(values)
+    return total / count
+
 
+def probe_frame_luma(
+    filepath: str | Path,
+    concat_list: bool = False,
+    timeout: int = 120,
+) -> list[float]:
+    """Per-frame mean luma (0-255) via signalstats, one value per decoded frame.
 
-def _parse_fps(stream: dict) -> float:
-    """Extract fps from stream, preferring r_frame_rate."""
-    rate_str = stream.get("r_frame_rate", stream.get("avg_frame_rate", "24/1"))
-    return _parse_rate(rate_str)
+    With concat_list=True, filepath is an ffmpeg concat demuxer list and the
+    values for every listed file come back, in order, from a single ffmpeg run.
+    Metadata is printed to stdout, scanned as bytes with one compiled regex;
+    the log is quietened and stderr discarded, so a long bulk pass buffers
+    nothing but the values.
+    """
+    ffmpeg = find_tool("ffmpeg")
+    if ffmpeg is None:
+        raise ProbeError("ffmpeg not found on PATH")
 
+    if concat_list:
+        input_args = ["-f", "concat", "-safe", "0", "-i", str(filepath)]
+    else:
+        input_args = ["-i", str(filepath)]
 
+    cmd = [
+        ffmpeg, *QUIET_ARGS,
+        *input_args,
+        "-map", "0:v:0", "-an",
+        "-vf", f"signalstats,metadata=mode=print:key={_YAVG_KEY}:file=-",
+        "-f", "null", "-",
+    ]
+    result = subprocess.run(
+        cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL, timeout=timeout,
+    )
+    if result.returncode != 0:
+        raise ProbeError(f"signalstats failed on {filepath} (exit code {result.returncode})")
+
+    values = []
+    for m in _YAVG_RE.finditer(result.stdout):
+        try:
+            values.append(float(m.group(1)))
+        except ValueError:
+            continue
+    return values
+
+
+@functools.lru_cache(maxsize=256)
 def _parse_rate(rate_str: str) -> float:
-    """Parse a fractional rate string like '24000/1001' to float."""
+    """Parse a fractional rate string like '24000/1001' to float.
+
+    Cached — a library repeats a handful of rate strings across every file.
+    """
     try:
         frac = Fraction(rate_str)
         return float(frac) if frac > 0 else 0.0
@@ -193,18 +485,27 @@ def _get_frame_count(stream: dict, duration: float, fps: float) -> int:
 
 
 def _get_rotation(stream: dict) -> int:
-    """Extract rotation from stream side data or tags."""
+    """Extract rotation from stream side data or tags.
+
+    Most streams carry neither, so absent keys return early without building
+    empty defaults.
+    """
     # Check side_data_list (newer ffprobe)
-    for sd in stream.get("side_data_list", []):
-        if "rotation" in sd:
-            try:
-                return abs(int(sd["rotation"]))
-            except (ValueError, TypeError):
-                pass
+    side_data_list = stream.get("side_data_list")
+    if side_data_list:
+        for sd in side_data_list:
+            rotation = sd.get("rotation")
+            if rotation is not None:
+                try:
+                    return abs(int(rotation))
+                except (ValueError, TypeError):
+                    pass
     # Check tags
-    tags = stream.get("tags", {})
-    rotate = tags.get("rotate", "0")
+    tags = stream.get("tags")
+    rotate = tags.get("rotate") if tags else None
+    if rotate is None:
+        return 0
     try:
         return abs(int(rotate))
-    except ValueError:
+    except (ValueError, TypeError):
         return 0
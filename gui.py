@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """Gradio GUI — same splicer pipeline as cli.py, browser-based interface."""
 
-import io
+import os
+import queue
 import random
 import sys
 import tempfile
@@ -15,9 +16,8 @@ import gradio as gr
 
 from core.config import SplicerConfig
 from core.platform import platform_check, PlatformError
-from core.probe import probe, ProbeError
-from core.normalize import normalize_video
-from core.chunk import chunk_video
+from core.normalize import normalize_batch
+from core.chunk import chunk_video, draw_sub_seeds
 from core.assemble import assemble
 from core.manifest import Manifest
 
@@ -49,13 +49,18 @@ class _LogStream:
     """Thread-safe stdout replacement that accumulates text for the log panel."""
 
     def __init__(self, echo=None):
-        self._buf = io.StringIO()
+        # Writes land in a SimpleQueue, so worker threads never contend on a
+        # lock; getvalue (the only reader) folds them into the cached text, so
+        # each poll only joins what arrived since the last one
+        self._text = ""
+        self._pending = queue.SimpleQueue()
         self._lock = threading.Lock()
+        self._changed = threading.Event()
         self._echo = echo
 
     def write(self, text):
-        with self._lock:
-            self._buf.write(text)
+        self._pending.put(text)
+        self._changed.set()
         if self._echo:
             self._echo.write(text)
 
@@ -65,7 +70,23 @@ class _LogStream:
 
     def getvalue(self):
         with self._lock:
-            return self._buf.getvalue()
+            # Clear before draining: a write racing this call re-sets the
+            # event, so its text is picked up on the next wake-up
+            self._changed.clear()
+            parts = []
+            while True:
+                try:
+                    parts.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            if parts:
+                self._text += "".join(parts)
+            return self._text
+
+    def wait(self, timeout):
+        """Block until text is written that getvalue hasn't returned yet, or
+        timeout passes; True if there is new text."""
+        return self._changed.wait(timeout)
 
 
 def _extract_paths(files):
@@ -85,6 +106,14 @@ def _extract_paths(files):
     return out
 
 
+def _filter_ext(paths, extensions):
+    """Paths whose extension is in extensions, as Path objects.
+
+    The extension is read from the string; only accepted paths become Paths.
+    """
+    return [Path(p) for p in paths if os.path.splitext(p)[1].lower() in extensions]
+
+
 # ---------------------------------------------------------------------------
 # Config builder
 # ---------------------------------------------------------------------------
@@ -149,8 +178,8 @@ def _run_pipeline(video_paths, image_paths, config):
     rng = random.Random(config.rng_seed)
     print(f"RNG seed: {config.rng_seed}")
 
-    videos = [Path(p) for p in video_paths if Path(p).suffix.lower() in VIDEO_EXTENSIONS]
-    images = [Path(p) for p in image_paths if Path(p).suffix.lower() in IMAGE_EXTENSIONS]
+    videos = _filter_ext(video_paths, VIDEO_EXTENSIONS)
+    images = _filter_ext(image_paths, IMAGE_EXTENSIONS)
     print(f"Inputs: {len(videos)} video(s), {len(images)} image(s)")
 
     if not videos and not images:
@@ -160,74 +189,66 @@ def _run_pipeline(video_paths, image_paths, config):
     output_dir = Path(tempfile.mkdtemp(prefix="splicer_gui_"))
     config.output_dir = str(output_dir)
 
-    with tempfile.TemporaryDirectory(prefix="splicer_work_") as tmpdir:
+    # The work dir lives inside the output dir, so intermediates and the final
+    # output share a filesystem: clips hardlink into place, never cross-copy.
+    # One worker pool for normalize and chunk: every job mostly waits on an
+    # ffmpeg subprocess, so threads (which share the redirected log) suffice
+    with tempfile.TemporaryDirectory(prefix="splicer_work_", dir=output_dir) as tmpdir, \
+            ThreadPoolExecutor(max_workers=config.max_workers) as pool:
         work = Path(tmpdir)
         norm_dir = work / "normalized"
         chunk_dir = work / "chunks"
         norm_dir.mkdir()
         chunk_dir.mkdir()
 
-        # --- Phase 1: Probe & Normalize ---
-        print(f"\n--- Normalizing ({config.max_workers} workers) ---")
-
-        def _norm(idx, vid):
-            try:
-                info = probe(vid)
-                tag = " (VFR)" if info.is_vfr else ""
-                out = norm_dir / f"norm_{idx:04d}.mp4"
-                normalize_video(vid, out, config, probe_result=info)
-                return idx, out, f"  [{idx+1}/{len(videos)}] {vid.name}{tag}"
-            except (ProbeError, RuntimeError) as e:
-                return idx, None, f"  [{idx+1}/{len(videos)}] {vid.name} SKIPPED: {e}"
-
-        with ThreadPoolExecutor(max_workers=config.max_workers) as pool:
-            futs = {pool.submit(_norm, i, v): i for i, v in enumerate(videos)}
-            rows = []
-            for f in as_completed(futs):
-                i, o, m = f.result()
-                print(m)
-                rows.append((i, o, m))
-
-        rows.sort(key=lambda r: r[0])
-        norm_vids = [o for _, o, _ in rows if o is not None]
-
-        valid_imgs = []
-        for i, img in enumerate(images):
-            print(f"  [img {i+1}/{len(images)}] {img.name}")
-            try:
-                probe(img)
-                valid_imgs.append(img)
-            except ProbeError as e:
-                print(f"    SKIPPED: {e}")
-
-        if not norm_vids and not valid_imgs:
-            raise ValueError("No inputs survived normalization")
+        # --- Phase 1+2: Probe, normalize and chunk ---
+        # A video's chunk job is queued the moment its normalize finishes, so
+        # chunking overlaps the remaining encodes instead of waiting for all
+        print(f"\n--- Normalizing and chunking ({config.max_workers} workers) ---")
 
-        # --- Phase 2: Chunk ---
-        print(f"\n--- Chunking ({config.max_workers} workers) ---")
-        sub_seeds = [rng.randint(0, 2**31 - 1) for _ in norm_vids]
+        # Sub-seeds are drawn per input up front, so results don't depend on
+        # which video finishes first
+        sub_seeds = draw_sub_seeds(rng, len(videos))
 
         def _chk(idx, path, sd):
             sub_rng = random.Random(sd)
             d = chunk_dir / f"v{idx:04d}"
             d.mkdir(exist_ok=True)
-            cs = chunk_video(path, d, config, sub_rng, start_index=0)
-            print(f"  [{idx+1}/{len(norm_vids)}] {path.name} -> {len(cs)} chunks")
+            cs = chunk_video(path, d, config, sub_rng, start_index=0, intra_only=True)
+            print(f"  [{idx+1}/{len(videos)}] {path.name} -> {len(cs)} chunks")
             return idx, cs
 
-        with ThreadPoolExecutor(max_workers=config.max_workers) as pool:
-            futs = {
-                pool.submit(_chk, i, p, s): i
-                for i, (p, s) in enumerate(zip(norm_vids, sub_seeds))
-            }
-            crs = []
-            for f in as_completed(futs):
-                crs.append(f.result())
+        chunk_futs = []
+        for i, o, res in normalize_batch(videos, norm_dir, config, pool):
+            if o is None:
+                print(f"  [{i+1}/{len(videos)}] {videos[i].name} SKIPPED: {res}")
+                continue
+            tag = " (VFR)" if res.is_vfr else ""
+            print(f"  [{i+1}/{len(videos)}] {videos[i].name}{tag}")
+            chunk_futs.append(pool.submit(_chk, i, o, sub_seeds[i]))
+
+        # Images are only checked to exist here; assemble's image encode
+        # decodes them anyway and skips any that fail, so no ffprobe per image
+        valid_imgs = []
+        for i, img in enumerate(images):
+            print(f"  [img {i+1}/{len(images)}] {img.name}")
+            if img.is_file():
+                valid_imgs.append(img)
+            else:
+                print("    SKIPPED: file not found")
+
+        # Slot per input, filled as results arrive — already in input order
+        crs = [None] * len(videos)
+        for f in as_completed(chunk_futs):
+            idx, cs = f.result()
+            crs[idx] = cs
+        crs = [cs for cs in crs if cs is not None]
+        if not crs and not valid_imgs:
+            raise ValueError("No inputs survived normalization")
 
-        crs.sort(key=lambda r: r[0])
         all_chunks = []
         ci = 0
-        for _, cs in crs:
+        for cs in crs:
             for c in cs:
                 c.chunk_index = ci
                 ci += 1
@@ -259,8 +280,8 @@ def _run_pipeline(video_paths, image_paths, config):
     print(f"\nOutput:   {out_video}")
     print(f"Manifest: {out_manifest}")
     print(f"Frames:   {manifest.actual_frame_count} (expected {manifest.expected_frame_count})")
-    if manifest.luma_flags:
-        print(f"Luma warnings: {len(manifest.luma_flags)}")
+    if manifest.luma_flag_count:
+        print(f"Luma warnings: {manifest.luma_flag_count}")
     print("Done.")
 
     return str(out_video), str(out_manifest)
@@ -315,9 +336,12 @@ def run_splicer(
     t = threading.Thread(target=_work, daemon=True)
     t.start()
 
+    # Wake on new output, not a fixed tick; an idle log is not re-sent, and a
+    # short pause after each update batches bursts of prints into one yield
     while not state["done"]:
-        time.sleep(0.4)
-        yield log.getvalue(), None, None, None
+        if log.wait(0.4):
+            yield log.getvalue(), None, None, None
+            time.sleep(0.2)
 
     t.join()
 
@@ -388,8 +412,9 @@ def run_benchmark_gen(
     t.start()
 
     while not state["done"]:
-        time.sleep(0.4)
-        yield log.getvalue()
+        if log.wait(0.4):
+            yield log.getvalue()
+            time.sleep(0.2)
 
     t.join()
     yield log.getvalue()